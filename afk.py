@@ -1,32 +1,153 @@
 import time
-import keyboard
+STARTUP_STARTED = time.perf_counter()  # For the cold-start report
+
 import threading
 import sys
 import os
-import webbrowser
+import argparse
 import json
+import struct
+import mmap
 import configparser
 import subprocess
-from PIL import ImageGrab
-from PyQt5 import QtWidgets, QtCore, QtGui
-import pyrobloxbot
+import tempfile
+import heapq
+import asyncio
+import random
+import math
+import queue
+import socket
+import concurrent.futures
+import http.server
+import multiprocessing
+import atexit
+import contextlib
+import inspect
+import logging
+import logging.handlers
+import numpy as np
+
+# PyQt5, PIL, keyboard, pyrobloxbot and the ahk library are imported where
+# they are first needed, so headless runs never load Qt and startup stays fast
+
+log = logging.getLogger("rbxafk")
+log_listener = None
+
+class RateLimitFilter(logging.Filter):
+    """Lets a repeated warning or error through at most once per interval, counting the ones dropped"""
+    def __init__(self, interval=30.0, max_messages=256, clock=time.monotonic):
+        super().__init__()
+        self.interval = interval
+        self.max_messages = max_messages
+        self.clock = clock
+        self.seen = {}  # (level, message) -> [last emitted time, suppressed count]
+
+    def filter(self, record):
+        if record.levelno < logging.WARNING:
+            return True
+        key = (record.levelno, record.getMessage())
+        now = self.clock()
+        entry = self.seen.get(key)
+        if entry is not None and now - entry[0] < self.interval:
+            entry[1] += 1
+            return False
+        if entry is not None and entry[1]:
+            record.msg = f"{record.msg} (suppressed {entry[1]} similar messages)"
+        elif entry is None and len(self.seen) >= self.max_messages:
+            self.prune(now)
+        self.seen[key] = [now, 0]
+        return True
+
+    def prune(self, now):
+        """Forget messages outside their interval, or the oldest one if all are recent"""
+        self.seen = {key: entry for key, entry in self.seen.items() if now - entry[0] < self.interval}
+        if len(self.seen) >= self.max_messages:
+            del self.seen[min(self.seen, key=lambda key: self.seen[key][0])]
+
+def setup_logging(log_file="", max_bytes=1000000, backup_count=3):
+    """Route log records through a queue to a background writer thread, replacing any previous setup"""
+    global log_listener
+    
+    if log_listener is not None:
+        log_listener.stop()
+    for handler in list(log.handlers):
+        log.removeHandler(handler)
+    
+    console = logging.StreamHandler(sys.stdout)
+    console.setFormatter(logging.Formatter("%(message)s"))
+    handlers = [console]
+    if log_file:
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+        file_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(threadName)s] %(message)s"))
+        handlers.append(file_handler)
+    
+    log_queue = queue.Queue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(RateLimitFilter())
+    log.addHandler(queue_handler)
+    log.setLevel(logging.INFO)
+    log.propagate = False
+    
+    log_listener = logging.handlers.QueueListener(log_queue, *handlers)
+    log_listener.start()
+
+def stop_logging():
+    """Flush queued log records and stop the writer thread"""
+    global log_listener
+    
+    if log_listener is not None:
+        log_listener.stop()
+        log_listener = None
+
+class BackgroundWriter:
+    """Runs file writes in order on a thread of their own, so the AFK loop never waits on the disk"""
+    def __init__(self, name, max_pending=256, timeout=5.0):
+        self.timeout = timeout
+        self.queue = queue.Queue(max_pending)
+        self.thread = threading.Thread(target=self.run, name=name)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def submit(self, callback, *args, block=False):
+        """Queue callback(*args), with block waiting up to timeout for room; returns False if dropped"""
+        try:
+            self.queue.put((callback, args), block, self.timeout)
+        except queue.Full:
+            if block:
+                log.error("Error: %s writer is stuck, dropped %s", self.thread.name, callback.__name__)
+            return False
+        return True
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            callback, args = item
+            try:
+                callback(*args)
+            except Exception as e:
+                log.error("Error in %s writer: %s", self.thread.name, e)
+
+    def close(self):
+        """Finish the queued writes (waiting up to timeout seconds) and stop the thread"""
+        try:
+            self.queue.put(None, True, self.timeout)
+        except queue.Full:
+            return
+        self.thread.join(self.timeout)
 
 # Configuration file path
 CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.ini")
 
-# Import AHK Python library
-ahk = None
+# AutoHotkey executable used by the input worker, found once by check_ahk_installation
+ahk_executable = None
 
-def load_config():
-    """Load configuration from file"""
+def create_default_config():
+    """Build the default configuration with the built-in profiles"""
     config = configparser.ConfigParser()
     
-    if os.path.exists(CONFIG_FILE):
-        config.read(CONFIG_FILE)
-        print("Configuration loaded")
-        return config
-    
-    # Create default config if it doesn't exist
     config["AHK"] = {"path": ""}
     
     # 3440x1440 settings (original)
@@ -62,63 +183,159 @@ def load_config():
     # Add active_profile setting
     config["General"] = {"active_profile": "3440x1440"}
     
-    save_config(config)
     return config
 
-def save_config(config):
-    """Save configuration to file"""
-    with open(CONFIG_FILE, 'w') as f:
-        config.write(f)
-    print("Configuration saved")
+class ConfigStore:
+    """Keeps config.ini parsed in memory, re-reading it only when its modification time changes"""
+    def __init__(self, path, write_delay=1.0):
+        self.path = path
+        self.write_delay = write_delay
+        self.lock = threading.RLock()
+        self.config = None
+        self.mtime = None
+        self.sections = {}
+        self.base = {}  # Sections as last read from or written to the file
+        self.profiles = {}  # Section name -> Profile, rebuilt only when that section changes
+        self.write_timer = None
+        self.merged = False  # A flush merged in an outside edit that poll() hasn't reported yet
 
-def initialize_ahk():
-    """Initialize AHK using the specified path or try to find it automatically"""
-    global ahk
-    
-    config = load_config()
-    ahk_path = config.get("AHK", "path", fallback="")
-    
-    # Try to use the configured path
-    if ahk_path and os.path.isfile(ahk_path):
-        try:
-            from ahk import AHK
-            ahk = AHK(executable_path=ahk_path, timeout=10)  # Increased timeout
-            print(f"AHK initialized with custom path: {ahk_path}")
-            return True
-        except Exception as e:
-            print(f"Failed to initialize AHK with path {ahk_path}: {e}")
-    
-    # Try to use the AHK library with default path
-    try:
-        from ahk import AHK
-        ahk = AHK(timeout=10)  # Increased timeout
-        
-        # Update config with the actual path used
-        if hasattr(ahk, "executable_path") and ahk.executable_path:
-            config["AHK"]["path"] = ahk.executable_path
-            save_config(config)
-            
-        print("AHK initialized with default path")
-        return True
-    except ImportError:
-        # Try to install the AHK library
-        print("AHK Python module not found, trying to install...")
-        import subprocess
+    def get(self):
+        """The parsed config, loading it on first use"""
+        with self.lock:
+            if self.config is None:
+                self.reload()
+            return self.config
+
+    def file_mtime(self):
         try:
-            subprocess.check_call([sys.executable, "-m", "pip", "install", "ahk"])
-            from ahk import AHK
-            ahk = AHK()
-            print("AHK Python module installed successfully")
+            return os.stat(self.path).st_mtime
+        except OSError:
+            return None
+
+    def reload(self):
+        """Parse the file (creating the default one if missing) and drop stale profiles"""
+        with self.lock:
+            mtime = self.file_mtime()
+            if mtime is None:
+                self.config = create_default_config()
+                self.flush()
+            else:
+                config = configparser.ConfigParser()
+                config.read(self.path)
+                self.config = config
+                self.mtime = mtime
+                self.base = self.section_values(config)
+                log.info("Configuration loaded")
+            self.update_sections()
+
+    @staticmethod
+    def section_values(config):
+        return {name: dict(config[name]) for name in config.sections()}
+
+    def update_sections(self):
+        """Only profiles whose section actually changed get rebuilt"""
+        sections = self.section_values(self.config)
+        for name in list(self.profiles):
+            if sections.get(name) != self.sections.get(name):
+                del self.profiles[name]
+        self.sections = sections
+
+    def poll(self):
+        """Reload if the file changed on disk; returns True when it did"""
+        with self.lock:
+            if self.merged:
+                self.merged = False
+                return True
+            if self.config is None or self.write_timer is not None:
+                return False
+            if self.file_mtime() == self.mtime:
+                return False
+            self.reload()
             return True
-        except:
-            print("Failed to install AHK Python module")
-            return False
-    except Exception as e:
-        print(f"Failed to initialize AHK: {e}")
-        return False
+
+    def profile(self, name):
+        """Cached Profile object for a config section"""
+        with self.lock:
+            profile = self.profiles.get(name)
+            if profile is None:
+                profile = Profile(name, self.get()[name])
+                self.profiles[name] = profile
+            return profile
+
+    def save(self, config=None):
+        """Schedule a write of the config, batching changes made close together"""
+        with self.lock:
+            if config is not None:
+                self.config = config
+            self.sections = self.section_values(self.config)
+            self.profiles.clear()
+            if self.write_timer is None:
+                self.write_timer = threading.Timer(self.write_delay, self.flush)
+                self.write_timer.daemon = True
+                self.write_timer.start()
+
+    def flush(self):
+        """Write any pending changes to disk now, merged into the file if it was edited meanwhile"""
+        with self.lock:
+            if self.write_timer is not None:
+                self.write_timer.cancel()
+                self.write_timer = None
+            mtime = self.file_mtime()
+            if mtime is not None and self.mtime is not None and mtime != self.mtime:
+                self.merge_file()
+            with open(self.path, 'w') as f:
+                self.config.write(f)
+            self.mtime = self.file_mtime()
+            self.base = self.section_values(self.config)
+            log.info("Configuration saved")
+
+    def merge_file(self):
+        """Apply our unsaved changes on top of a file that was edited since we last read it"""
+        config = configparser.ConfigParser()
+        config.read(self.path)
+        ours = self.section_values(self.config)
+        for name, values in ours.items():
+            base = self.base.get(name)
+            if not config.has_section(name):
+                if values == base:
+                    continue  # Removed outside, and unchanged here
+                config.add_section(name)
+            for key, value in values.items():
+                if base is None or base.get(key) != value:
+                    config[name][key] = value
+            for key in base or ():
+                if key not in values:
+                    config.remove_option(name, key)
+        for name in self.base:
+            if name not in ours:
+                config.remove_section(name)
+        self.config = config
+        self.update_sections()
+        self.merged = True
+        log.info("Configuration was edited while a save was pending, merged the changes")
+
+    def close(self):
+        """Flush pending writes, if any"""
+        with self.lock:
+            if self.write_timer is not None:
+                self.flush()
+
+config_store = ConfigStore(CONFIG_FILE)
+atexit.register(stop_logging)
+atexit.register(config_store.close)
+
+def load_config():
+    """Load configuration, parsing the file only when it has changed"""
+    return config_store.get()
+
+def save_config(config):
+    """Save configuration to file (batched)"""
+    config_store.save(config)
 
 def select_ahk_executable():
     """Opens a file dialog to select the AutoHotkey executable"""
+    from PyQt5 import QtWidgets
+    
     app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
     
     file_dialog = QtWidgets.QFileDialog()
@@ -141,50 +358,48 @@ def select_ahk_executable():
             config["AHK"]["path"] = ahk_path
             save_config(config)
             
-            print(f"Selected AHK executable: {ahk_path}")
+            log.info(f"Selected AHK executable: {ahk_path}")
             return ahk_path
     
     return None
 
-def check_ahk_installation():
+def check_ahk_installation(interactive=True):
     """Check if AutoHotkey is installed and configured"""
-    global ahk
+    global ahk_executable
     
     # First check if we have a valid path in config
     config = load_config()
     ahk_path = config.get("AHK", "path", fallback="")
     
-    # If we have a configured path, use it without additional checking
+    # If we have a configured path, use it without additional checking, so a normal start never imports ahk
     if ahk_path and os.path.isfile(ahk_path):
-        print(f"Using AutoHotkey from configured path: {ahk_path}")
-        
-        # Try to initialize AHK with this path directly
-        try:
-            from ahk import AHK
-            ahk = AHK(executable_path=ahk_path)
-            print("AHK initialized successfully")
-            return True
-        except Exception as e:
-            print(f"Error initializing AHK with configured path: {e}")
+        log.info(f"Using AutoHotkey from configured path: {ahk_path}")
+        ahk_executable = ahk_path
+        return True
     
-    # If no path configured or failed to initialize, try with default path
+    # If no path configured, ask the ahk library where AutoHotkey is and save it for the next start
     try:
         from ahk import AHK
-        ahk = AHK()
-        
-        # If successful, update the config with the path
-        if hasattr(ahk, "executable_path") and ahk.executable_path:
-            config["AHK"]["path"] = ahk.executable_path
+        ahk_path = getattr(AHK(), "executable_path", "")
+        if ahk_path:
+            if not config.has_section("AHK"):
+                config.add_section("AHK")
+            config["AHK"]["path"] = ahk_path
             save_config(config)
-            print(f"AHK initialized with default path: {ahk.executable_path}")
-        else:
-            print("AHK initialized with unknown path")
-            
-        return True
+            log.info(f"AHK found at default path: {ahk_path}")
+            ahk_executable = ahk_path
+            return True
+        log.error("AHK library did not report an executable path")
     except Exception as e:
-        print(f"Failed to initialize AHK with default path: {e}")
+        log.error("Failed to find AHK with default path: %s", e)
+    
+    if not interactive:
+        log.error("Set [AHK] path in config.ini to your AutoHotkey executable")
+        return False
     
     # If all automatic methods failed, ask user to select the executable
+    from PyQt5 import QtWidgets
+    
     msg_box = QtWidgets.QMessageBox()
     msg_box.setWindowTitle("AutoHotkey Required")
     msg_box.setText("AutoHotkey is required but couldn't be found automatically.")
@@ -197,13 +412,9 @@ def check_ahk_installation():
     if msg_box.clickedButton() == select_btn:
         ahk_path = select_ahk_executable()
         if ahk_path:
-            try:
-                from ahk import AHK
-                ahk = AHK(executable_path=ahk_path)
-                print(f"AHK initialized with selected path: {ahk_path}")
-                return True
-            except Exception as e:
-                print(f"Failed to initialize AHK with selected path: {e}")
+            log.info(f"Using AutoHotkey from selected path: {ahk_path}")
+            ahk_executable = ahk_path
+            return True
     
     return False
 
@@ -213,50 +424,770 @@ PIXEL_TO_CHECK = (1670, 650)
 EXPECTED_COLOR = (58, 59, 61)
 BUTTON_PIXEL = (1822, 785)
 EXPECTED_BUTTON_COLOR = (255, 255, 255)
-JUMP_INTERVAL = 5  # seconds
 TOGGLE_KEY = "f4"  # Using simpler keyboard library
+DEBUG_INTERVAL = 10  # seconds between debug pixel dumps
+CONFIG_POLL_INTERVAL = 2  # seconds between checks for edits to config.ini
+FULL_CHECK_EVERY = 10  # unchanged checks before the full match is run anyway
+CLICK_COOLDOWN = 0.5  # seconds to wait after a click before clicking the same window again
+WATCHDOG_INTERVAL = 1.0  # seconds between watchdog checks of the heartbeats
+ACTIVE_PROFILE = None  # Profile object for the active profile
 
 # Global state
 running = False
 app = None
 overlay = None
+input_worker = None
+afk_task = None  # asyncio task running the AFK loop
+runtime = None
+excluded_rects = ()  # Screen rects (left, top, right, bottom) hidden from detection, i.e. the overlay
+supervisor = None
 
-def check_pixel_color(x, y, expected_color, tolerance=10):
-    """Check if pixel at (x,y) matches the expected RGB color within a tolerance"""
-    try:
-        screenshot = ImageGrab.grab(bbox=(x, y, x+1, y+1))
-        actual_color = screenshot.getpixel((0, 0))
+class Metrics:
+    """In-process counters, gauges and latency histograms, keyed by name plus optional labels"""
+    BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}  # key -> [bucket counts..., +Inf count, sum]
+
+    @staticmethod
+    def key(name, labels):
+        return (name, tuple(sorted(labels.items())))
+
+    def inc(self, name, amount=1, **labels):
+        key = self.key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def set(self, name, value, **labels):
+        with self.lock:
+            self.gauges[self.key(name, labels)] = value
+
+    def observe(self, name, seconds, **labels):
+        key = self.key(name, labels)
+        with self.lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = [0] * (len(self.BUCKETS) + 1) + [0.0]
+            for i, bound in enumerate(self.BUCKETS):
+                if seconds <= bound:
+                    hist[i] += 1
+                    break
+            else:
+                hist[len(self.BUCKETS)] += 1
+            hist[-1] += seconds
+
+    @contextlib.contextmanager
+    def timer(self, name, **labels):
+        """Time a block and record it in a histogram"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def snapshot(self):
+        """All current values as plain JSON-friendly data"""
+        def label_name(name, labels):
+            if not labels:
+                return name
+            return name + "{" + ",".join(f"{k}={v}" for k, v in labels) + "}"
+        
+        with self.lock:
+            histograms = {}
+            for (name, labels), hist in self.histograms.items():
+                count = sum(hist[:-1])
+                histograms[label_name(name, labels)] = {
+                    "count": count,
+                    "sum": hist[-1],
+                    "avg": hist[-1] / count if count else 0.0,
+                }
+            return {
+                "time": time.time(),
+                "counters": {label_name(n, l): v for (n, l), v in self.counters.items()},
+                "gauges": {label_name(n, l): v for (n, l), v in self.gauges.items()},
+                "histograms": histograms,
+            }
+
+    def render_prometheus(self):
+        """Prometheus text exposition format"""
+        def escape(value):
+            # Label values escape backslash, double quote and line feed
+            return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
         
-        # Check if each RGB component is within the tolerance range
-        r_match = abs(actual_color[0] - expected_color[0]) <= tolerance
-        g_match = abs(actual_color[1] - expected_color[1]) <= tolerance
-        b_match = abs(actual_color[2] - expected_color[2]) <= tolerance
+        def labels_text(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in pairs) + "}"
         
-        return r_match and g_match and b_match
-    except Exception as e:
-        print(f"Error checking pixel color: {e}")
-        return False
+        lines = []
+        with self.lock:
+            for (name, labels), value in sorted(self.counters.items()):
+                lines.append(f"rbxafk_{name}{labels_text(labels)} {value}")
+            for (name, labels), value in sorted(self.gauges.items()):
+                lines.append(f"rbxafk_{name}{labels_text(labels)} {value}")
+            for (name, labels), hist in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, count in zip(self.BUCKETS + ("+Inf",), hist[:-1]):
+                    cumulative += count
+                    lines.append(f"rbxafk_{name}_bucket{labels_text(labels, [('le', bound)])} {cumulative}")
+                lines.append(f"rbxafk_{name}_sum{labels_text(labels)} {hist[-1]}")
+                lines.append(f"rbxafk_{name}_count{labels_text(labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+    def dump_jsonl(self, path):
+        """Append one snapshot line to a JSONL file"""
+        with open(path, "a") as f:
+            f.write(json.dumps(self.snapshot()) + "\n")
+
+metrics = Metrics()
+
+class MetricsHandler(http.server.BaseHTTPRequestHandler):
+    """Serves /metrics (Prometheus text) and /metrics.json"""
+    def do_GET(self):
+        if self.path == "/metrics":
+            body = metrics.render_prometheus().encode()
+            content_type = "text/plain; version=0.0.4"
+        elif self.path == "/metrics.json":
+            body = json.dumps(metrics.snapshot()).encode()
+            content_type = "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Keep scrapes out of the console
+
+def start_metrics_server(port):
+    """Serve the metrics on localhost in a background thread"""
+    server = http.server.HTTPServer(("127.0.0.1", port), MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    log.info(f"Metrics available at http://127.0.0.1:{port}/metrics")
+    return server
+
+def grab_screen(bbox):
+    """Default capture backend: grab a screen region with PIL"""
+    from PIL import ImageGrab
+    return ImageGrab.grab(bbox=bbox)
+
+class PilCapture:
+    """PIL ImageGrab: works everywhere, but among the slowest paths"""
+    name = "pil"
+
+    def __call__(self, bbox):
+        return grab_screen(bbox)
+
+class MssCapture:
+    """Raw BGRA grabs with mss (BitBlt on Windows, XGetImage on Linux), returned as an RGB view"""
+    name = "mss"
+
+    def __init__(self):
+        import mss
+        self.mss = mss
+        self.local = threading.local()  # mss handles can't be shared between threads
+
+    def __call__(self, bbox):
+        grabber = getattr(self.local, "grabber", None)
+        if grabber is None:
+            grabber = self.local.grabber = self.mss.mss()
+        left, top, right, bottom = bbox
+        shot = grabber.grab({"left": left, "top": top, "width": right - left, "height": bottom - top})
+        return np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)[:, :, 2::-1]
+
+class DxcamCapture:
+    """Desktop Duplication grabs with dxcam (Windows 8+), served from a GPU-shared surface"""
+    name = "dxcam"
+
+    def __init__(self):
+        if sys.platform != "win32":
+            raise OSError("dxcam needs Windows")
+        import dxcam
+        self.camera = dxcam.create(output_color="RGB")
+        self.last_bbox = None
+        self.last = None
+
+    def __call__(self, bbox):
+        frame = self.camera.grab(region=bbox)
+        if frame is None:
+            # dxcam only returns a frame when the screen changed since the last grab
+            if bbox != self.last_bbox:
+                raise RuntimeError("dxcam returned no frame")
+            return self.last
+        self.last_bbox, self.last = bbox, frame
+        return frame
+
+class SyntheticCapture:
+    """Serves crops of an RGB array as the screen, for tests and benchmarks"""
+    name = "synthetic"
+
+    def __init__(self, screen):
+        self.screen = screen
+
+    def __call__(self, bbox):
+        left, top, right, bottom = bbox
+        return self.screen[top:bottom, left:right]
+
+# Real screen backends, in the order tried when they are equally fast
+CAPTURE_BACKENDS = {"dxcam": DxcamCapture, "mss": MssCapture, "pil": PilCapture}
+
+class FallbackCapture:
+    """Captures with the first backend in the list, using the next one for any call it fails"""
+    MAX_FAILURES = 3  # Failures in a row before the first backend is moved behind the one that worked
+
+    def __init__(self, backends):
+        self.backends = list(backends)
+        self.failures = 0
+
+    @property
+    def name(self):
+        return self.backends[0].name
+
+    def __call__(self, bbox):
+        error = None
+        for backend in self.backends:
+            try:
+                image = backend(bbox)
+            except Exception as e:
+                error = error or e
+                if backend is self.backends[0]:
+                    self.failures += 1
+                continue
+            if backend is self.backends[0]:
+                self.failures = 0
+            elif self.failures >= self.MAX_FAILURES:
+                failed = self.backends[0]
+                self.backends.remove(backend)
+                self.backends.insert(0, backend)
+                self.failures = 0
+                log.warning("Warning: Capture backend %s keeps failing (%s), switching to %s",
+                            failed.name, error, backend.name)
+                metrics.inc("capture_fallbacks_total", backend=backend.name)
+            return image
+        raise error
+
+class TimedCapture:
+    """Runs a capture backend on a helper thread and gives up on grabs that take too long"""
+    def __init__(self, backend, timeout=2.0):
+        self.backend = backend
+        self.timeout = timeout
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
 
-def show_pixel_info():
+    @property
+    def name(self):
+        return self.backend.name
+
+    def __call__(self, bbox):
+        future = self.executor.submit(self.backend, bbox)
+        try:
+            return future.result(self.timeout)
+        except concurrent.futures.TimeoutError:
+            # A grab stuck in a driver call can't be interrupted: leave the thread to it, and let
+            # FallbackCapture move on to the next backend
+            self.executor.shutdown(wait=False)
+            self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+            metrics.inc("capture_timeouts_total", backend=self.name)
+            raise TimeoutError(f"{self.name} capture took over {self.timeout:g} s")
+
+def benchmark_capture(backend, bbox, rounds=5):
+    """Median seconds per capture of bbox, after one warm-up grab"""
+    backend(bbox)
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        backend(bbox)
+        times.append(time.perf_counter() - start)
+    return sorted(times)[len(times) // 2]
+
+def select_capture(bbox, preferred="auto", backends=None, rounds=5, timeout=None):
+    """Benchmark the available backends on bbox and chain them fastest first, or preferred first"""
+    backends = backends or CAPTURE_BACKENDS
+    timings = {}
+    for name, factory in backends.items():
+        try:
+            backend = factory()
+            timings[name] = (benchmark_capture(backend, bbox, rounds), backend)
+        except Exception as e:
+            log.debug(f"Capture backend {name} unavailable: {e}")
+    
+    for name, (seconds, _) in timings.items():
+        metrics.set("capture_backend_seconds", seconds, backend=name)
+    order = sorted(timings, key=lambda name: (name != preferred, timings[name][0]))
+    if not order:
+        log.warning("Warning: No capture backend works for this screen, using PIL")
+        return FallbackCapture([PilCapture()])
+    
+    log.info("Capture backends: " + ", ".join(f"{name} {timings[name][0] * 1000:.2f} ms" for name in order)
+             + f" - using {order[0]}")
+    chain = [timings[name][1] for name in order]
+    if timeout:  # Each backend in the chain gives up on stuck grabs
+        chain = [TimedCapture(backend, timeout) for backend in chain]
+    return FallbackCapture(chain)
+
+capture_backend = None
+
+def get_capture():
+    """Shared capture chain, benchmarked on the active profile's probe region on first use"""
+    global capture_backend
+    
+    if capture_backend is None:
+        config = load_config()
+        preferred = config.get("General", "capture", fallback="auto")
+        if preferred != "auto" and preferred not in CAPTURE_BACKENDS:
+            log.warning("Warning: Unknown capture backend '%s', choosing automatically", preferred)
+        capture_backend = select_capture(PixelSampler.bounding_box([PIXEL_TO_CHECK, BUTTON_PIXEL]), preferred,
+                                         timeout=config.getfloat("General", "capture_timeout", fallback=2.0))
+    return capture_backend
+
+class Frame:
+    """A captured screen region as an RGB array plus the screen position of its top-left pixel"""
+    def __init__(self, pixels, left, top, seq=0):
+        self.pixels = pixels
+        self.left = left
+        self.top = top
+        self.seq = seq  # Number of the capture in its FrameRing, 0 if none
+
+    def covers(self, x, y):
+        height, width = self.pixels.shape[:2]
+        return self.left <= x < self.left + width and self.top <= y < self.top + height
+
+    def color(self, x, y):
+        """RGB color at absolute screen position (x, y)"""
+        return tuple(int(c) for c in self.pixels[y - self.top, x - self.left, :3])
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # Python < 3.8
+    shared_memory = None
+
+if shared_memory is not None:
+    class SharedBlock(shared_memory.SharedMemory):
+        """Shared memory whose close() leaves a mapping NumPy views still use to be freed with them"""
+        def close(self):
+            try:
+                super().close()
+            except BufferError:
+                pass
+
+def open_shared_memory(name=None, size=0):
+    """Create (or with a name, open) a shared memory block"""
+    if shared_memory is None:
+        raise ImportError("multiprocessing.shared_memory needs Python 3.8")
+    return SharedBlock(name=name, create=name is None, size=size)
+
+class FrameRing:
+    """Preallocated ring of captured frames in shared memory, handed out as views instead of copies"""
+    # Preamble: newest sequence number, slot count, slot width, slot height
+    PREAMBLE = 4
+    # Per-slot header columns, stored as float64 after the preamble
+    SEQ, LEFT, TOP, HEIGHT, WIDTH, TIME = range(6)
+    HEADER_COLUMNS = 6
+
+    def __init__(self, slots=4, width=1, height=1, name=None):
+        # Other processes map an existing ring with FrameRing(name=ring.name)
+        self.owner = name is None
+        self.memory = None
+        if self.owner:
+            self.allocate(slots, width, height)
+        else:
+            self.attach(name)
+
+    @staticmethod
+    def header_bytes(slots):
+        return 8 * (FrameRing.PREAMBLE + slots * FrameRing.HEADER_COLUMNS)
+
+    def allocate(self, slots, width, height):
+        size = self.header_bytes(slots) + slots * height * width * 3
+        try:
+            self.memory = open_shared_memory(size=size)
+            buffer = self.memory.buf
+        except ImportError:
+            buffer = bytearray(size)  # Process memory only: name is None and nothing can attach
+        self.map(buffer, slots, width, height)
+        self.preamble[1:] = (slots, width, height)
+
+    def attach(self, name):
+        try:
+            self.memory = open_shared_memory(name)
+        except ImportError:
+            raise ValueError("FrameRing sharing needs multiprocessing.shared_memory (Python 3.8+)") from None
+        slots, width, height = (int(v) for v in
+                                np.frombuffer(self.memory.buf, dtype=np.float64, count=self.PREAMBLE)[1:])
+        self.map(self.memory.buf, slots, width, height)
+
+    def map(self, buffer, slots, width, height):
+        """Build the NumPy views over the shared buffer"""
+        self.slots, self.width, self.height = slots, width, height
+        header = np.frombuffer(buffer, dtype=np.float64, count=self.header_bytes(slots) // 8)
+        self.preamble = header[:self.PREAMBLE]
+        self.table = header[self.PREAMBLE:].reshape(slots, self.HEADER_COLUMNS)
+        self.pixels = np.frombuffer(buffer, dtype=np.uint8, offset=self.header_bytes(slots),
+                                    count=slots * height * width * 3).reshape(slots, height, width, 3)
+
+    @property
+    def name(self):
+        return self.memory.name if self.memory is not None else None
+
+    def reserve(self, width, height):
+        """Grow the slots to fit a width x height region, dropping older frames"""
+        if width <= self.width and height <= self.height:
+            return
+        if not self.owner:
+            raise ValueError("Only the process that created a FrameRing can resize it")
+        seq = self.preamble[0]
+        slots = self.slots
+        self.release()
+        self.allocate(slots, max(width, self.width), max(height, self.height))
+        self.preamble[0] = seq
+
+    def write(self, image, left, top):
+        """Copy a captured image (PIL or array) into the next slot and return its Frame"""
+        source = np.asarray(image)
+        height, width = source.shape[:2]
+        self.reserve(width, height)
+        
+        # The slot is reused after `slots` more captures; consumers copy a frame to keep it longer
+        seq = int(self.preamble[0]) + 1
+        slot = seq % self.slots
+        view = self.pixels[slot, :height, :width]
+        np.copyto(view, source[:, :, :3])
+        self.table[slot] = (seq, left, top, height, width, time.time())
+        self.preamble[0] = seq
+        return Frame(view, left, top, seq)
+
+    def get(self, seq):
+        """Frame number seq, or None if it was never written or has been overwritten"""
+        slot = seq % self.slots
+        row = self.table[slot]
+        if seq <= 0 or int(row[self.SEQ]) != seq:
+            return None
+        height, width = int(row[self.HEIGHT]), int(row[self.WIDTH])
+        return Frame(self.pixels[slot, :height, :width], int(row[self.LEFT]), int(row[self.TOP]), seq)
+
+    def latest(self):
+        """The newest frame, or None before the first capture"""
+        return self.get(int(self.preamble[0]))
+
+    def age(self, frame):
+        """Seconds since frame was captured"""
+        return time.time() - self.table[frame.seq % self.slots][self.TIME]
+
+    def release(self):
+        """Unmap the shared memory, freeing it if this process created it"""
+        if self.memory is None:
+            return
+        memory, self.memory = self.memory, None
+        self.preamble = self.table = self.pixels = None
+        if self.owner:
+            memory.unlink()
+        memory.close()
+
+    def __del__(self):
+        self.release()
+
+frame_ring = None
+
+def get_frame_ring():
+    """Shared FrameRing for the capture stage, created on first use"""
+    global frame_ring
+    
+    if frame_ring is None:
+        frame_ring = FrameRing()
+        atexit.register(frame_ring.release)
+    return frame_ring
+
+class PixelSampler:
+    """Reads several probe pixels from a single screen capture, into the FrameRing if it has one"""
+    def __init__(self, capture=None, ring=None):
+        # Any callable taking a (left, top, right, bottom) bbox and returning
+        # a PIL image or RGB array works, so tests can feed synthetic frames
+        self.capture = capture or get_capture()
+        self.ring = ring
+
+    @staticmethod
+    def bounding_box(points):
+        """Smallest capture bbox covering every probe point"""
+        xs = [p[0] for p in points]
+        ys = [p[1] for p in points]
+        return (min(xs), min(ys), max(xs) + 1, max(ys) + 1)
+
+    def grab(self, points):
+        """Capture the bounding box of the points once and return it as a Frame"""
+        bbox = self.bounding_box(points)
+        image = self.capture(bbox)
+        if self.ring is not None:
+            return self.ring.write(image, bbox[0], bbox[1])
+        return Frame(np.asarray(image)[:, :, :3], bbox[0], bbox[1])
+
+    def sample(self, points):
+        """Capture once and return the RGB color of each point, in order"""
+        frame = self.grab(points)
+        return [frame.color(x, y) for x, y in points]
+
+class ProbeMatcher:
+    """Scores ((x, y), (r, g, b)) probes and ((x, y), image) reference patches in one NumPy pass"""
+    SENTINELS_PER_PATCH = 16
+
+    def __init__(self, probes, patches=(), tolerance=10):
+        xs, ys, colors, weights = [], [], [], []
+        
+        for (x, y), color in probes:
+            xs.append(x)
+            ys.append(y)
+            colors.append(color[:3])
+            weights.append(1.0)
+        
+        # Each patch pixel becomes a probe, weighted so the whole patch counts as one
+        for (x, y), patch in patches:
+            patch = np.asarray(patch)[:, :, :3]
+            height, width = patch.shape[:2]
+            py, px = np.mgrid[0:height, 0:width]
+            xs.extend((px.ravel() + x).tolist())
+            ys.extend((py.ravel() + y).tolist())
+            colors.extend(patch.reshape(-1, 3).tolist())
+            weights.extend([1.0 / (height * width)] * (height * width))
+        
+        if not xs:
+            raise ValueError("ProbeMatcher needs at least one probe or patch")
+        
+        self.xs = np.array(xs, dtype=np.intp)
+        self.ys = np.array(ys, dtype=np.intp)
+        self.colors = np.array(colors, dtype=np.int16)
+        self.base_weights = np.array(weights, dtype=np.float64)
+        self.weights = self.base_weights
+        self.limits = tolerance  # Per-channel tolerance, a scalar or one row per probe
+        self.starts = np.zeros(1, dtype=np.intp)  # First probe of each group, see combine()
+        self.group_totals = np.add.reduceat(self.weights, self.starts)
+        
+        # Sentinels are the pixels watched for changes between frames: every
+        # point probe plus an evenly spread sample of each patch
+        sentinels = list(range(len(probes)))
+        offset = len(probes)
+        for _, patch in patches:
+            size = np.asarray(patch).shape[0] * np.asarray(patch).shape[1]
+            step = max(1, size // self.SENTINELS_PER_PATCH)
+            sentinels.extend(range(offset, offset + size, step))
+            offset += size
+        self.sentinels = np.array(sentinels, dtype=np.intp)
+        self.sentinels_cover_all = len(sentinels) == len(xs)
+        
+        # Corner points are enough for the sampler to size its capture
+        self.points = [(int(self.xs.min()), int(self.ys.min())),
+                       (int(self.xs.max()), int(self.ys.max()))]
+
+    @classmethod
+    def combine(cls, matchers):
+        """One matcher holding matchers[i] as probe group i, all scored by score_groups() in a single pass"""
+        if len(matchers) == 1:
+            return matchers[0]
+        combined = cls.__new__(cls)
+        sizes = [len(m.xs) for m in matchers]
+        combined.starts = np.concatenate(([0], np.cumsum(sizes)[:-1])).astype(np.intp)
+        combined.xs = np.concatenate([m.xs for m in matchers])
+        combined.ys = np.concatenate([m.ys for m in matchers])
+        combined.colors = np.concatenate([m.colors for m in matchers])
+        combined.base_weights = np.concatenate([m.base_weights for m in matchers])
+        combined.weights = combined.base_weights
+        combined.group_totals = np.add.reduceat(combined.weights, combined.starts)
+        combined.limits = np.repeat([m.limits for m in matchers], sizes)[:, None]
+        combined.sentinels = np.concatenate([m.sentinels + start for m, start in zip(matchers, combined.starts)])
+        combined.sentinels_cover_all = all(m.sentinels_cover_all for m in matchers)
+        combined.points = [(int(combined.xs.min()), int(combined.ys.min())),
+                           (int(combined.xs.max()), int(combined.ys.max()))]
+        return combined
+
+    def read(self, frame):
+        """Actual colors under every probe, as an (N, 3) array"""
+        return frame.pixels[self.ys - frame.top, self.xs - frame.left].astype(np.int16)
+
+    def read_sentinels(self, frame):
+        """Colors under the sentinel pixels only, for cheap change detection"""
+        if self.sentinels_cover_all:
+            return self.read(frame)
+        ys = self.ys[self.sentinels] - frame.top
+        xs = self.xs[self.sentinels] - frame.left
+        return frame.pixels[ys, xs].astype(np.int16)
+
+    def exclude(self, rects):
+        """Ignore probes inside any (left, top, right, bottom) rect; returns how many are hidden"""
+        visible = np.ones(len(self.xs), dtype=bool)
+        for left, top, right, bottom in rects:
+            visible &= ~((self.xs >= left) & (self.xs < right) & (self.ys >= top) & (self.ys < bottom))
+        self.weights = self.base_weights * visible
+        self.group_totals = np.add.reduceat(self.weights, self.starts)
+        return int(len(visible) - visible.sum())
+
+    def score_groups(self, actual):
+        """Weighted fraction of matching probe colors for every group, each 0.0 to 1.0"""
+        matches = (np.abs(actual - self.colors) <= self.limits).all(axis=1)
+        scores = np.add.reduceat(matches * self.weights, self.starts)
+        # A group whose probes are all hidden scores 0
+        return np.divide(scores, self.group_totals, out=np.zeros_like(scores), where=self.group_totals > 0)
+
+    def score_colors(self, actual):
+        """Weighted fraction of probe colors that match, from 0.0 to 1.0 (first group only)"""
+        if len(self.starts) > 1:
+            return float(self.score_groups(actual)[0])
+        total = self.group_totals[0]
+        if not total:
+            return 0.0  # Every probe is hidden
+        matches = (np.abs(actual - self.colors) <= self.limits).all(axis=1)
+        return float(np.dot(matches, self.weights) / total)
+
+    def score(self, frame):
+        """Weighted fraction of probes that match the frame, from 0.0 to 1.0"""
+        return self.score_colors(self.read(frame))
+
+def color_matches(actual_color, expected_color, tolerance=10):
+    """Check if an RGB color matches the expected color within a tolerance"""
+    return (abs(actual_color[0] - expected_color[0]) <= tolerance and
+            abs(actual_color[1] - expected_color[1]) <= tolerance and
+            abs(actual_color[2] - expected_color[2]) <= tolerance)
+
+def show_pixel_info(colors=None, profile=None):
     """Debug function to show the actual color of pixels we're checking"""
     try:
-        pixel1 = ImageGrab.grab(bbox=(PIXEL_TO_CHECK[0], PIXEL_TO_CHECK[1], 
-                                    PIXEL_TO_CHECK[0]+1, PIXEL_TO_CHECK[1]+1)).getpixel((0, 0))
-        pixel2 = ImageGrab.grab(bbox=(BUTTON_PIXEL[0], BUTTON_PIXEL[1], 
-                                    BUTTON_PIXEL[0]+1, BUTTON_PIXEL[1]+1)).getpixel((0, 0))
+        expected_color = profile.expected_color if profile else EXPECTED_COLOR
+        expected_button_color = profile.expected_button_color if profile else EXPECTED_BUTTON_COLOR
+        
+        # Reuse colors already sampled this tick instead of grabbing the screen again
+        if colors is None:
+            frame = frame_ring.latest() if frame_ring is not None else None
+            if (frame is not None and frame_ring.age(frame) < 1.0
+                    and frame.covers(*PIXEL_TO_CHECK) and frame.covers(*BUTTON_PIXEL)):
+                colors = [frame.color(*PIXEL_TO_CHECK), frame.color(*BUTTON_PIXEL)]
+            else:
+                colors = PixelSampler().sample([PIXEL_TO_CHECK, BUTTON_PIXEL])
+        pixel1, pixel2 = colors
         
         # Show actual colors and whether they match within tolerance
-        p1_match = "Match" if check_pixel_color(*PIXEL_TO_CHECK, EXPECTED_COLOR) else "No Match"
-        p2_match = "Match" if check_pixel_color(*BUTTON_PIXEL, EXPECTED_BUTTON_COLOR) else "No Match"
+        p1_match = "Match" if color_matches(pixel1, expected_color) else "No Match"
+        p2_match = "Match" if color_matches(pixel2, expected_button_color) else "No Match"
         
-        print(f"Debug - Pixel 1 color: {pixel1}, Expected: {EXPECTED_COLOR} - {p1_match}")
-        print(f"Debug - Pixel 2 color: {pixel2}, Expected: {EXPECTED_BUTTON_COLOR} - {p2_match}")
+        log.info(f"Debug - Pixel 1 color: {pixel1}, Expected: {expected_color} - {p1_match}")
+        log.info(f"Debug - Pixel 2 color: {pixel2}, Expected: {expected_button_color} - {p2_match}")
     except Exception as e:
-        print(f"Error in show_pixel_info: {e}")
+        log.error("Error in show_pixel_info: %s", e)
+
+def parse_probes(value):
+    """Parse 'x,y,r,g,b; x,y,r,g,b' into a list of ((x, y), (r, g, b)) probes"""
+    probes = []
+    for entry in value.split(";"):
+        if entry.strip():
+            x, y, r, g, b = (int(v) for v in entry.split(","))
+            probes.append(((x, y), (r, g, b)))
+    return probes
+
+def parse_patches(value):
+    """Parse 'x,y,image.png; ...' into a list of ((x, y), image) reference patches"""
+    from PIL import Image
+    
+    patches = []
+    for entry in value.split(";"):
+        if entry.strip():
+            x, y, path = (v.strip() for v in entry.split(",", 2))
+            if not os.path.isabs(path):
+                path = os.path.join(os.path.dirname(CONFIG_FILE), path)
+            patches.append(((int(x), int(y)), Image.open(path).convert("RGB")))
+    return patches
+
+class Profile:
+    """Detection and timing settings read from one resolution profile section"""
+    def __init__(self, name, section):
+        self.name = name
+        self.section = dict(section)  # Raw values, so a worker process can rebuild the profile
+        
+        self.pixel_to_check = (
+            int(section.get("pixel_check_x", "1670")),
+            int(section.get("pixel_check_y", "650"))
+        )
+        self.expected_color = (
+            int(section.get("expected_color_r", "58")),
+            int(section.get("expected_color_g", "59")),
+            int(section.get("expected_color_b", "61"))
+        )
+        self.button_pixel = (
+            int(section.get("button_pixel_x", "1822")),
+            int(section.get("button_pixel_y", "785"))
+        )
+        self.expected_button_color = (
+            int(section.get("expected_button_color_r", "255")),
+            int(section.get("expected_button_color_g", "255")),
+            int(section.get("expected_button_color_b", "255"))
+        )
+        
+        # These values should be in each profile
+        self.jump_interval = int(section.get("jump_interval", "5"))
+        self.toggle_key = section.get("toggle_key", "f4")
+        self.window_title = section.get("window_title", "Roblox")
+        # "screen" for absolute coordinates, "client" for coordinates inside the Roblox window
+        self.coordinates = section.get("coordinates", "screen").strip().lower()
+        
+        # Optional detector settings
+        self.color_tolerance = int(section.get("color_tolerance", "10"))
+        self.match_threshold = float(section.get("match_threshold", "1.0"))
+        self.extra_probes = parse_probes(section.get("extra_probes", ""))
+        self.reference_patches = parse_patches(section.get("reference_patches", ""))
+        
+        # Optional timing settings
+        self.check_interval = float(section.get("check_interval", "0.1"))
+        # No back-off unless asked for: a dialog must never wait longer than check_interval to be seen
+        self.max_check_interval = max(self.check_interval,
+                                      float(section.get("max_check_interval", self.check_interval)))
+        self.check_backoff = max(1.0, float(section.get("check_backoff", "1.5")))
+        self.jump_jitter = float(section.get("jump_jitter", "0"))
+
+    def build_matcher(self):
+        """Disconnect dialog matcher for this profile, in profile coordinates"""
+        probes = [(self.pixel_to_check, self.expected_color),
+                  (self.button_pixel, self.expected_button_color)] + self.extra_probes
+        return ProbeMatcher(probes, self.reference_patches, self.color_tolerance)
+
+class Rule:
+    """A screen recognised by its probes, and what to do when it shows up, from a [Rule name] section"""
+    ACTIONS = ("click", "send", "jump", "log")  # "click x,y", "send keys" (AutoHotkey Send syntax), "jump", "log"
+
+    def __init__(self, name, section):
+        self.name = name
+        self.profile = section.get("profile", "").strip()
+        self.threshold = float(section.get("match_threshold", "1.0"))
+        self.cooldown = float(section.get("cooldown", "5"))
+        self.matcher = ProbeMatcher(parse_probes(section.get("probes", "")),
+                                    parse_patches(section.get("reference_patches", "")),
+                                    int(section.get("color_tolerance", "10")))
+        
+        self.action, _, self.argument = section.get("action", "log").strip().partition(" ")
+        if self.action not in self.ACTIONS:
+            raise ValueError(f"unknown action '{self.action}'")
+        if self.action == "click":
+            x, y = (int(v) for v in self.argument.split(","))
+            self.point = (x, y)
+
+def load_rules(config):
+    """Rules from every [Rule name] section, skipping (and reporting) broken ones"""
+    rules = []
+    for section_name in config.sections():
+        if not section_name.startswith("Rule "):
+            continue
+        name = section_name[len("Rule "):].strip()
+        try:
+            rules.append(Rule(name, config[section_name]))
+        except (ValueError, OSError) as e:
+            log.warning("Warning: Skipping rule %s: %s", name, e)
+    return rules
 
 def load_pixel_coordinates():
     """Load pixel coordinates from the active profile in config"""
-    global PIXEL_TO_CHECK, EXPECTED_COLOR, BUTTON_PIXEL, EXPECTED_BUTTON_COLOR, JUMP_INTERVAL, TOGGLE_KEY
+    global PIXEL_TO_CHECK, EXPECTED_COLOR, BUTTON_PIXEL, EXPECTED_BUTTON_COLOR, TOGGLE_KEY, ACTIVE_PROFILE
     
     config = load_config()
     
@@ -265,12 +1196,12 @@ def load_pixel_coordinates():
     
     # Ensure the profile exists, fall back to 3440x1440 if not
     if not config.has_section(active_profile):
-        print(f"Warning: Profile {active_profile} not found, using default 3440x1440")
+        log.warning("Warning: Profile %s not found, using default 3440x1440", active_profile)
         active_profile = "3440x1440"
         
         # If even 3440x1440 doesn't exist, create it with default values
         if not config.has_section("3440x1440"):
-            print("Creating default 3440x1440 profile")
+            log.info("Creating default 3440x1440 profile")
             config["3440x1440"] = {
                 "pixel_check_x": "1670",
                 "pixel_check_y": "650",
@@ -288,43 +1219,24 @@ def load_pixel_coordinates():
             save_config(config)
     
     # Load settings from the active profile
-    profile = config[active_profile]
-    
-    PIXEL_TO_CHECK = (
-        int(profile.get("pixel_check_x", "1670")),
-        int(profile.get("pixel_check_y", "650"))
-    )
+    profile = config_store.profile(active_profile)
+    ACTIVE_PROFILE = profile
     
-    EXPECTED_COLOR = (
-        int(profile.get("expected_color_r", "58")),
-        int(profile.get("expected_color_g", "59")),
-        int(profile.get("expected_color_b", "61"))
-    )
+    PIXEL_TO_CHECK = profile.pixel_to_check
+    EXPECTED_COLOR = profile.expected_color
+    BUTTON_PIXEL = profile.button_pixel
+    EXPECTED_BUTTON_COLOR = profile.expected_button_color
+    TOGGLE_KEY = profile.toggle_key
     
-    BUTTON_PIXEL = (
-        int(profile.get("button_pixel_x", "1822")),
-        int(profile.get("button_pixel_y", "785"))
-    )
-    
-    EXPECTED_BUTTON_COLOR = (
-        int(profile.get("expected_button_color_r", "255")),
-        int(profile.get("expected_button_color_g", "255")),
-        int(profile.get("expected_button_color_b", "255"))
-    )
-    
-    # These values should be in each profile
-    JUMP_INTERVAL = int(profile.get("jump_interval", "5"))
-    TOGGLE_KEY = profile.get("toggle_key", "f4")
-    
-    print(f"Loaded profile: {active_profile}")
-    print(f"Check pixel: {PIXEL_TO_CHECK}, Button pixel: {BUTTON_PIXEL}")
+    log.info(f"Loaded profile: {active_profile}")
+    log.info(f"Check pixel: {PIXEL_TO_CHECK}, Button pixel: {BUTTON_PIXEL}")
 
 def switch_profile(profile_name):
     """Switch to a different resolution profile"""
     config = load_config()
     
     if not config.has_section(profile_name):
-        print(f"Profile {profile_name} does not exist!")
+        log.warning("Profile %s does not exist!", profile_name)
         return False
     
     # Make sure the General section exists
@@ -338,11 +1250,170 @@ def switch_profile(profile_name):
     # Reload the coordinates
     load_pixel_coordinates()
     
-    print(f"Switched to profile: {profile_name}")
+    log.info(f"Switched to profile: {profile_name}")
     return True
 
+# Calibration
+
+def to_gray(pixels):
+    """Grayscale float64 copy of an RGB array"""
+    return pixels[:, :, :3].astype(np.float64) @ np.array([0.299, 0.587, 0.114])
+
+def downsample(gray, factor):
+    """Shrink a grayscale array by averaging factor x factor blocks"""
+    if factor <= 1:
+        return gray
+    h, w = gray.shape[0] // factor, gray.shape[1] // factor
+    return gray[:h * factor, :w * factor].reshape(h, factor, w, factor).mean(axis=(1, 3))
+
+def match_template(image, template):
+    """Sum of squared differences of template at every position in image"""
+    ih, iw = image.shape
+    th, tw = template.shape
+    if th > ih or tw > iw or th == 0 or tw == 0:
+        return None
+    
+    # sum((I - T)^2) = sum(I^2) - 2 * sum(I * T) + sum(T^2): window sums of I^2 come from
+    # an integral image and the correlation from FFTs, so the template size barely matters
+    integral = np.zeros((ih + 1, iw + 1))
+    integral[1:, 1:] = np.cumsum(np.cumsum(image ** 2, axis=0), axis=1)
+    window_sq = (integral[th:, tw:] - integral[:-th, tw:]
+                 - integral[th:, :-tw] + integral[:-th, :-tw])
+    
+    correlation = np.fft.irfft2(np.fft.rfft2(image) * np.conj(np.fft.rfft2(template, image.shape)),
+                                image.shape)[:ih - th + 1, :iw - tw + 1]
+    return window_sq - 2 * correlation + (template ** 2).sum()
+
+def find_template(pixels, template, scales, coarse=4):
+    """Locate a template image in a screen array at several scales; returns (x, y, scale, rms_error) or None"""
+    from PIL import Image
+    
+    screen = to_gray(pixels)
+    screen_coarse = downsample(screen, coarse)
+    
+    best = None
+    for scale in scales:
+        width = int(round(template.width * scale))
+        height = int(round(template.height * scale))
+        if width < coarse * 2 or height < coarse * 2:
+            continue
+        scaled = to_gray(np.asarray(template.convert("RGB").resize((width, height), Image.BILINEAR)))
+        ssd = match_template(screen_coarse, downsample(scaled, coarse))
+        if ssd is None:
+            continue
+        y, x = (int(v) for v in np.unravel_index(np.argmin(ssd), ssd.shape))
+        error = ssd[y, x] / ((height // coarse) * (width // coarse))
+        if best is None or error < best[0]:
+            best = (error, x * coarse, y * coarse, scale, scaled)
+    
+    if best is None:
+        return None
+    
+    # Refine around the coarse hit at full resolution
+    _, cx, cy, scale, scaled = best
+    height, width = scaled.shape
+    left, top = max(0, cx - coarse), max(0, cy - coarse)
+    right = min(screen.shape[1], cx + coarse + width)
+    bottom = min(screen.shape[0], cy + coarse + height)
+    ssd = match_template(screen[top:bottom, left:right], scaled)
+    y, x = (int(v) for v in np.unravel_index(np.argmin(ssd), ssd.shape))
+    rms = float(np.sqrt(max(ssd[y, x], 0.0) / (height * width)))
+    return left + x, top + y, scale, rms
+
+def parse_point(value):
+    """Parse 'x,y' into an (x, y) tuple"""
+    x, y = (int(v) for v in value.split(","))
+    return (x, y)
+
+def calibrate_profile(pixels, config=None):
+    """Find the disconnect dialog in a screen array and write a profile for this screen size; returns its name"""
+    from PIL import Image
+    
+    if config is None:
+        config = load_config()
+    if not config.has_section("Calibration"):
+        log.error("Calibration needs a [Calibration] section with template, check_offset and button_offset")
+        return None
+    settings = config["Calibration"]
+    try:
+        check_offset = parse_point(settings["check_offset"])
+        button_offset = parse_point(settings["button_offset"])
+    except (KeyError, ValueError):
+        log.error("Calibration needs check_offset and button_offset as x,y in the [Calibration] section")
+        return None
+    
+    template_path = settings.get("template", "")
+    if not os.path.isabs(template_path):
+        template_path = os.path.join(os.path.dirname(CONFIG_FILE), template_path)
+    if not os.path.isfile(template_path):
+        log.error("Calibration template not found: %s", template_path)
+        return None
+    # Changing the template or the offsets invalidates cached results
+    cache_key = "%d %d,%d %d,%d" % ((int(os.path.getmtime(template_path)),) + check_offset + button_offset)
+    
+    height, width = pixels.shape[:2]
+    geometry = f"{width}x{height}"
+    profile_name = f"auto_{geometry}"
+    
+    # Reuse an earlier result for this screen size
+    if settings.get(f"cache_{geometry}") == cache_key and config.has_section(profile_name):
+        log.info(f"Using cached calibration {profile_name}")
+        return profile_name
+    
+    start = time.perf_counter()
+    template = Image.open(template_path)
+    scales = [float(v) for v in settings.get("scales", "0.5, 0.75, 1.0, 1.25, 1.5, 2.0").split(",")]
+    found = find_template(pixels, template, scales, int(settings.get("coarse", "4")))
+    elapsed = (time.perf_counter() - start) * 1000
+    
+    max_error = float(settings.get("max_error", "25"))
+    if found is None or found[3] > max_error:
+        log.warning("Calibration could not find the dialog on a %s screen (%.0f ms)", geometry, elapsed)
+        return None
+    
+    x, y, scale, rms = found
+    check = (x + int(round(check_offset[0] * scale)), y + int(round(check_offset[1] * scale)))
+    button = (x + int(round(button_offset[0] * scale)), y + int(round(button_offset[1] * scale)))
+    check_color = tuple(int(c) for c in pixels[check[1], check[0], :3])
+    button_color = tuple(int(c) for c in pixels[button[1], button[0], :3])
+    
+    # Start from the active profile so timing and key settings carry over
+    active_profile = config.get("General", "active_profile", fallback="3440x1440")
+    section = dict(config[active_profile]) if config.has_section(active_profile) else {}
+    section.update({
+        "pixel_check_x": str(check[0]),
+        "pixel_check_y": str(check[1]),
+        "expected_color_r": str(check_color[0]),
+        "expected_color_g": str(check_color[1]),
+        "expected_color_b": str(check_color[2]),
+        "button_pixel_x": str(button[0]),
+        "button_pixel_y": str(button[1]),
+        "expected_button_color_r": str(button_color[0]),
+        "expected_button_color_g": str(button_color[1]),
+        "expected_button_color_b": str(button_color[2]),
+    })
+    config[profile_name] = section
+    config["Calibration"][f"cache_{geometry}"] = cache_key
+    save_config(config)
+    
+    log.info(f"Calibrated {profile_name}: dialog at {(x, y)} scale {scale}, "
+             f"error {rms:.1f}, check pixel {check}, button pixel {button} ({elapsed:.0f} ms)")
+    return profile_name
+
+def calibrate_from_source(source):
+    """Calibrate from a screenshot file, or from the live screen when source is 'screen'"""
+    from PIL import Image, ImageGrab
+    
+    if source == "screen":
+        image = ImageGrab.grab()
+    else:
+        image = Image.open(source)
+    return calibrate_profile(np.asarray(image.convert("RGB")))
+
 def create_resolution_menu():
     """Create a menu for selecting different resolution profiles"""
+    from PyQt5 import QtWidgets
+    
     menu = QtWidgets.QMenu()
     
     config = load_config()
@@ -350,7 +1421,7 @@ def create_resolution_menu():
     
     # Add profiles from config
     for section in config.sections():
-        if section not in ["AHK", "General"]:
+        if section not in ["AHK", "General"] and not section.startswith(("Session ", "Rule ")):
             action = menu.addAction(section)
             action.setCheckable(True)
             action.setChecked(section == active_profile)
@@ -358,133 +1429,2309 @@ def create_resolution_menu():
     
     return menu
 
-class OverlayWidget(QtWidgets.QWidget):
-    """Custom overlay widget that stays on top"""
-    def __init__(self):
-        super().__init__()
-        self.setWindowFlags(
+def session_stats(snapshot):
+    """Per-session (confidence, clicks, jumps) from a metrics snapshot"""
+    counters = snapshot["counters"]
+    prefix = "confidence{session="
+    stats = {}
+    for key, confidence in sorted(snapshot["gauges"].items()):
+        if key.startswith(prefix):
+            name = key[len(prefix):-1]
+            stats[name] = (confidence, counters.get(f"clicks_total{{session={name}}}", 0),
+                           counters.get(f"jumps_total{{session={name}}}", 0))
+    return stats
+
+def status_lines(snapshot, previous=None):
+    """Live status text for the overlay panel, from this and the previous metrics snapshot"""
+    counters = snapshot["counters"]
+    lines = [f"AFK ON - {TOGGLE_KEY.upper()} to stop"]
+    
+    if previous is not None and snapshot["time"] > previous["time"]:
+        elapsed = snapshot["time"] - previous["time"]
+        checks = counters.get("checks_total", 0) - previous["counters"].get("checks_total", 0)
+        line = f"{checks / elapsed:.1f} checks/s"
+        now = snapshot["histograms"].get("capture_seconds")
+        before = previous["histograms"].get("capture_seconds", {"count": 0, "sum": 0.0})
+        if now and now["count"] > before["count"]:
+            capture = (now["sum"] - before["sum"]) / (now["count"] - before["count"])
+            line += f", capture {capture * 1000:.1f} ms"
+        lines.append(line)
+    
+    for name, (confidence, clicks, jumps) in session_stats(snapshot).items():
+        lines.append(f"{name}: {confidence:.2f}, {clicks} clicks, {jumps} jumps")
+    return lines
+
+class OverlayWidget:
+    """Stay-on-top overlay shown while AFK mode is active, in the [General] overlay style"""
+    def __init__(self, mode="banner", corner="bottom-right", refresh=1.0):
+        from PyQt5 import QtWidgets, QtCore
+        
+        self.mode = mode
+        self.corner = corner
+        self.widget = QtWidgets.QWidget()
+        self.widget.setWindowFlags(
             QtCore.Qt.WindowStaysOnTopHint |
             QtCore.Qt.FramelessWindowHint |
             QtCore.Qt.Tool
         )
-        self.setAttribute(QtCore.Qt.WA_TranslucentBackground)
-        self.setStyleSheet("background-color: rgba(0, 0, 0, 180);")
         
         # Set up the layout
-        layout = QtWidgets.QVBoxLayout(self)
-        
-        # Create label with bigger, red text
+        layout = QtWidgets.QVBoxLayout(self.widget)
         self.label = QtWidgets.QLabel(f"AFK MODE ACTIVE - PRESS {TOGGLE_KEY.upper()} TO STOP")
-        self.label.setAlignment(QtCore.Qt.AlignCenter)
-        self.label.setStyleSheet("color: #FF0000; font-size: 24px; font-weight: bold; padding: 20px;")
         
-        # Add label to layout (removed resolution selection button)
-        layout.addWidget(self.label)
-        self.setLayout(layout)
+        if mode == "banner":
+            self.widget.setAttribute(QtCore.Qt.WA_TranslucentBackground)
+            self.widget.setStyleSheet("background-color: rgba(0, 0, 0, 180);")
+            
+            # Create label with bigger, red text
+            self.label.setAlignment(QtCore.Qt.AlignCenter)
+            self.label.setStyleSheet("color: #FF0000; font-size: 24px; font-weight: bold; padding: 20px;")
+            layout.addWidget(self.label)
+            self.widget.resize(600, 80)
+        else:
+            # Badge and panel are opaque and small, so there is nothing to composite over the game
+            layout.setContentsMargins(0, 0, 0, 0)
+            self.widget.setStyleSheet("background-color: #000000;")
+            self.label.setStyleSheet("color: #FF4040; font-size: 12px; font-weight: bold; padding: 4px;")
+            self.label.setText(f"AFK ON - {TOGGLE_KEY.upper()}")
+            layout.addWidget(self.label)
+            self.widget.adjustSize()
+        self.widget.setLayout(layout)
         
-        # Set size for overlay (made a bit smaller since we removed the button)
-        self.resize(600, 80)
+        # The panel shows live loop metrics, redrawn every refresh seconds if the text changed
+        self.timer = None
+        self.previous = None
+        if mode == "panel":
+            self.label.setStyleSheet(self.label.styleSheet() + " font-family: monospace;")
+            self.timer = QtCore.QTimer(self.widget)
+            self.timer.setInterval(int(refresh * 1000))
+            self.timer.timeout.connect(self.refresh)
+        self.place()
+    
+    def place(self):
+        """Center the banner, or put the badge and panel in the configured corner"""
+        from PyQt5 import QtWidgets
         
-        # Center on screen
-        screen_geometry = QtWidgets.QApplication.desktop().screenGeometry()
-        x = (screen_geometry.width() - self.width()) // 2
-        y = (screen_geometry.height() - self.height()) // 2
-        self.move(x, y)
+        screen = QtWidgets.QApplication.desktop().availableGeometry()
+        if self.mode == "banner":
+            x = (screen.width() - self.widget.width()) // 2
+            y = (screen.height() - self.widget.height()) // 2
+        else:
+            margin = 10
+            x = screen.left() + margin if "left" in self.corner else screen.right() - self.widget.width() - margin
+            y = screen.top() + margin if "top" in self.corner else screen.bottom() - self.widget.height() - margin
+        self.widget.move(x, y)
+        if self.widget.isVisible():
+            self.publish_rect()
+    
+    def publish_rect(self):
+        """Hide the pixels under the overlay from detection (in physical pixels)"""
+        global excluded_rects
         
+        scale = self.widget.devicePixelRatioF()
+        rect = self.widget.frameGeometry()
+        excluded_rects = ((int(rect.left() * scale), int(rect.top() * scale),
+                           int((rect.right() + 1) * scale), int((rect.bottom() + 1) * scale)),)
+    
+    def refresh(self):
+        snapshot = metrics.snapshot()
+        text = "\n".join(status_lines(snapshot, self.previous))
+        self.previous = snapshot
+        if text != self.label.text():
+            self.label.setText(text)
+            self.widget.adjustSize()
+            self.place()
+    
     def show_overlay(self):
         """Show the overlay"""
-        self.show()
-    
+        self.widget.show()
+        self.publish_rect()
+        if self.timer is not None:
+            self.previous = None
+            self.refresh()
+            self.timer.start()
+
     def hide_overlay(self):
         """Hide the overlay"""
-        self.hide()
+        global excluded_rects
+        
+        if self.timer is not None:
+            self.timer.stop()
+        self.widget.hide()
+        excluded_rects = ()
 
 def create_overlay():
     """Create a simple overlay window showing the script is active"""
     global overlay
     
     if overlay is None:
-        overlay = OverlayWidget()
+        config = load_config()
+        mode = config.get("General", "overlay", fallback="banner")
+        if mode == "off":
+            return None
+        overlay = OverlayWidget(mode, config.get("General", "overlay_corner", fallback="bottom-right"),
+                                config.getfloat("General", "overlay_refresh", fallback=1.0))
     
     overlay.show_overlay()
     return overlay
 
-def run_ahk_script():
-    """Use AHK Python library or click.exe to perform clicking"""
-    global ahk
+# AutoHotkey script for the persistent input worker. It reads one command per
+# line from stdin and answers each with "ok" or "error" on stdout.
+AHK_WORKER_SCRIPT = r"""
+#NoEnv
+#NoTrayIcon
+#SingleInstance Off
+CoordMode, Mouse, Screen
+stdin := FileOpen("*", "r `n")
+stdout := FileOpen("*", "w `n")
+Loop
+{
+    line := Trim(stdin.ReadLine(), " `t`r`n")
+    if (line = "")
+    {
+        if (stdin.AtEOF)
+            ExitApp
+        continue
+    }
+    parts := StrSplit(line, " ", "", 2)
+    cmd := parts[1]
+    arg := parts[2]
+    reply := "ok"
+    if (cmd = "click")
+    {
+        xy := StrSplit(arg, " ")
+        x := xy[1]
+        y := xy[2]
+        Click, %x%, %y%
+    }
+    else if (cmd = "activate")
+    {
+        WinActivate, %arg%
+        WinWaitActive, %arg%,, 1
+        if ErrorLevel
+            reply := "error window not active"
+    }
+    else if (cmd = "send")
+        Send, %arg%
+    else if (cmd = "exit")
+        ExitApp
+    else if (cmd != "ping")
+        reply := "error unknown command " cmd
+    stdout.WriteLine(reply)
+    stdout.Read(0)
+}
+"""
+
+class AhkWorkerBackend:
+    """Long-lived AutoHotkey process that takes input commands over a pipe"""
+    def __init__(self, executable_path):
+        self.executable_path = executable_path
+        self.process = None
+        self.script_path = None
+
+    def start(self):
+        """Write the worker script and launch AutoHotkey on it"""
+        fd, self.script_path = tempfile.mkstemp(suffix=".ahk", prefix="rbxafk_")
+        with os.fdopen(fd, "w") as f:
+            f.write(AHK_WORKER_SCRIPT)
+        self.process = subprocess.Popen(
+            [self.executable_path, "/ErrorStdOut", self.script_path],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            universal_newlines=True,
+            bufsize=1
+        )
+        self.send("ping")
+
+    def send(self, command):
+        """Send one command line and wait for the worker's reply"""
+        if self.process is None or self.process.poll() is not None:
+            raise RuntimeError("AHK worker is not running")
+        self.process.stdin.write(command + "\n")
+        self.process.stdin.flush()
+        reply = self.process.stdout.readline().strip()
+        if not reply:
+            raise RuntimeError("AHK worker exited")
+        return reply
+
+    def alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def kill(self):
+        """Kill the worker process from any thread, failing a send stuck waiting on it"""
+        process = self.process
+        if process is not None and process.poll() is None:
+            process.kill()
+
+    def close(self):
+        """Stop the worker process and remove its script"""
+        if self.process is not None:
+            try:
+                if self.process.poll() is None:
+                    self.process.stdin.write("exit\n")
+                    self.process.stdin.flush()
+                    self.process.wait(timeout=2)
+            except Exception:
+                self.process.kill()
+            self.process = None
+        if self.script_path and os.path.exists(self.script_path):
+            os.remove(self.script_path)
+            self.script_path = None
+
+class StubInputBackend:
+    """Input backend that records commands instead of sending them, for tests"""
+    def __init__(self):
+        self.commands = []
+
+    def start(self):
+        pass
+
+    def send(self, command):
+        self.commands.append(command)
+        return "ok"
+
+    def alive(self):
+        return True
+
+    def kill(self):
+        pass
+
+    def close(self):
+        pass
+
+class AhkCommandError(RuntimeError):
+    """The AHK worker answered a command with an error; the worker itself is fine"""
+
+class InputWorker:
+    """Sends click, activate and key commands through a backend and tracks round-trip latency"""
+    def __init__(self, backend):
+        self.backend = backend
+        self.lock = threading.Lock()
+        self.latency = {}  # command -> [count, total seconds, max seconds]
+        self.backend.start()
+
+    def command(self, line):
+        """Send a raw command line and record how long the reply took"""
+        name = line.split(" ", 1)[0]
+        with self.lock:
+            start = time.perf_counter()
+            reply = self.backend.send(line)
+            elapsed = time.perf_counter() - start
+            stats = self.latency.setdefault(name, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += elapsed
+            stats[2] = max(stats[2], elapsed)
+        if reply != "ok":
+            raise AhkCommandError(f"AHK worker {name} failed: {reply}")
+        return elapsed
+
+    def click(self, x, y):
+        return self.command(f"click {x} {y}")
+
+    def activate(self, title):
+        return self.command(f"activate {title}")
+
+    def send_keys(self, keys):
+        return self.command(f"send {keys}")
+
+    def alive(self):
+        return self.backend.alive()
+
+    def latency_report(self):
+        """One line per command type with count, average and worst round-trip"""
+        lines = []
+        for name, (count, total, worst) in sorted(self.latency.items()):
+            lines.append(f"{name}: {count} calls, avg {total / count * 1000:.1f} ms, max {worst * 1000:.1f} ms")
+        return lines
+
+    def close(self):
+        self.backend.close()
+
+def get_input_worker():
+    """Start the persistent input worker on first use, or again after its process died"""
+    global input_worker
     
+    if input_worker is not None and not input_worker.alive():
+        log.warning("Warning: AHK worker process exited, starting a new one")
+        stop_input_worker()
+    if input_worker is None and ahk_executable is not None:
+        input_worker = InputWorker(AhkWorkerBackend(ahk_executable))
+    return input_worker
+
+def kill_input_worker():
+    """Kill the input worker's process so a command stuck on it fails; the next one gets a new worker"""
+    worker = input_worker
+    if worker is not None:
+        worker.backend.kill()
+
+def stop_input_worker():
+    """Report click latency and shut the input worker down"""
+    global input_worker
+    
+    if input_worker is not None:
+        for line in input_worker.latency_report():
+            log.info(f"Input latency - {line}")
+        input_worker.close()
+        input_worker = None
+
+def run_ahk_script(button=None, window_title="Roblox"):
+    """Activate Roblox and click the button through the persistent AHK worker"""
+    if button is None:
+        button = BUTTON_PIXEL
+    
+    worker = None
     try:
-        if ahk is not None:
-            # Instead of using win_activate which may cause the error,
-            # use a direct AHK script execution
-            script = f"""
-            WinActivate, Roblox
-            Sleep 200
-            Click {BUTTON_PIXEL[0]}, {BUTTON_PIXEL[1]}
-            """
-            
-            # Run the script directly
-            result = ahk.run_script(script)
-            print(f"Clicked at {BUTTON_PIXEL} using AHK script")
-            return True
-            
-        return False  # AHK not available
+        worker = get_input_worker()
+        if worker is None:
+            return False  # AHK not available
+        
+        worker.activate(window_title)
+        elapsed = worker.click(*button)
+        log.info(f"Clicked at {button} using AHK worker ({elapsed * 1000:.0f} ms)")
+        return True
+    except AhkCommandError as e:
+        log.warning("Warning: %s", e)  # e.g. the window didn't activate; the worker is still usable
+        return False
     except Exception as e:
-        print(f"Failed to execute AHK command: {e}")
+        log.error("Failed to execute AHK command: %s", e)
+        # Drop the worker so the next click starts a fresh one, unless it was already replaced
+        if worker is input_worker:
+            stop_input_worker()
         return False
 
-def afk_loop():
-    """The main AFK functionality loop"""
-    global running
+class ScheduledTask:
+    """A periodic or one-shot job owned by a Scheduler"""
+    def __init__(self, name, callback, period, jitter=0.0, max_period=None, backoff=1.0):
+        self.name = name
+        self.callback = callback
+        self.period = period  # None for one-shot tasks
+        self.current_period = period  # Backed off up to max_period while the callback returns False
+        self.jitter = jitter
+        self.max_period = max_period or period
+        self.backoff = backoff
+        self.extra_delay = 0.0
+        self.due = 0.0
+        self.cancelled = False
+
+    def postpone(self, seconds):
+        """Push the next run back by an extra delay"""
+        self.extra_delay += seconds
+
+    def cancel(self):
+        self.cancelled = True
+
+    def adapt(self, changed):
+        """Stretch the period while nothing changes, snap back as soon as something does"""
+        if changed is True:
+            self.current_period = self.period
+        elif changed is False:
+            self.current_period = min(self.current_period * self.backoff, self.max_period)
+
+class AsyncWake:
+    """threading.Event-like wake-up flag for a scheduler running on an asyncio loop, settable from any thread"""
+    def __init__(self, loop):
+        self.loop = loop
+        self.thread = threading.get_ident()
+        self.event = asyncio.Event()
+
+    def set(self):
+        if threading.get_ident() == self.thread:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(self.event.set)
+
+    def clear(self):
+        self.event.clear()
+
+class Scheduler:
+    """Heap-based timer that runs each AFK task when due and reschedules it by its own period"""
+    def __init__(self, clock=time.monotonic, wait=None, rng=random.uniform):
+        self.clock = clock
+        self.wake = threading.Event()
+        self.wait = wait or self.wake.wait
+        self.rng = rng
+        self.heap = []
+        self.counter = 0
+        self.stopped = False
+
+    def push(self, task, due):
+        task.due = due
+        self.counter += 1
+        heapq.heappush(self.heap, (due, self.counter, task))
+        self.wake.set()
+
+    def every(self, name, period, callback, jitter=0.0, max_period=None, backoff=1.5, delay=0.0):
+        """Run callback every period seconds, starting after delay"""
+        task = ScheduledTask(name, callback, period, jitter, max_period, backoff)
+        self.push(task, self.clock() + delay)
+        return task
+
+    def call_later(self, delay, name, callback):
+        """Run callback once after delay seconds"""
+        task = ScheduledTask(name, callback, None)
+        self.push(task, self.clock() + delay)
+        return task
+
+    def reschedule(self, task, now):
+        delay = task.current_period + task.extra_delay
+        if task.jitter:
+            delay += self.rng(0, task.jitter)
+        task.extra_delay = 0.0
+        # Keep a steady cadence unless we have fallen a whole period behind
+        due = task.due + delay
+        self.push(task, due if due > now else now + delay)
+
+    def pop_due(self):
+        """The next due task and the time it was taken, or (None, seconds until the next one)"""
+        while self.heap:
+            now = self.clock()
+            due, _, task = self.heap[0]
+            if due > now:
+                return None, due - now
+            heapq.heappop(self.heap)
+            if not task.cancelled:
+                metrics.observe("loop_lag_seconds", now - due, task=task.name)
+                return task, now
+        return None, None
+
+    def finish(self, task, now, changed=None, error=None):
+        """Adapt or postpone a task after it ran and put it back on the heap"""
+        if error is None:
+            task.adapt(changed)
+        else:
+            metrics.inc("errors_total", task=task.name)
+            log.error("Error in %s task: %s", task.name, error)
+            task.postpone(1)  # Delay on error
+        if task.period is not None and not task.cancelled:
+            self.reschedule(task, now)
+
+    def run_pending(self):
+        """Run every task that is due and return seconds until the next one"""
+        while True:
+            task, now = self.pop_due()
+            if task is None:
+                return now
+            try:
+                with metrics.timer("task_seconds", task=task.name):
+                    changed = task.callback()
+            except Exception as e:
+                self.finish(task, now, error=e)
+            else:
+                self.finish(task, now, changed)
+
+    async def run_pending_async(self):
+        """Like run_pending(), awaiting callbacks that return a coroutine"""
+        while True:
+            task, now = self.pop_due()
+            if task is None:
+                return now
+            try:
+                with metrics.timer("task_seconds", task=task.name):
+                    changed = task.callback()
+                    if inspect.isawaitable(changed):
+                        changed = await changed
+            except Exception as e:
+                self.finish(task, now, error=e)
+            else:
+                self.finish(task, now, changed)
+
+    def run(self):
+        """Run tasks until stop() is called"""
+        while not self.stopped:
+            self.wake.clear()
+            timeout = self.run_pending()
+            if self.stopped:
+                break
+            self.wait(timeout)
+
+    async def run_async(self):
+        """Run tasks on the current asyncio loop until stop() is called or the task is cancelled"""
+        self.wake = AsyncWake(asyncio.get_event_loop())
+        while not self.stopped:
+            self.wake.clear()
+            timeout = await self.run_pending_async()
+            if self.stopped:
+                break
+            try:
+                await asyncio.wait_for(self.wake.event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def stop(self):
+        self.stopped = True
+        self.wake.set()
+
+# Window geometry
+
+class StubWindowBackend:
+    """Window backend with fixed rectangles, for tests and non-Windows hosts"""
+    def __init__(self, windows=None):
+        self.windows = dict(windows or {})  # title -> (left, top, right, bottom)
+        self.focused = None  # Title of the simulated foreground window
+        self.on_change = None
+
+    def find(self, title):
+        return title if title in self.windows else None
+
+    def client_rect(self, handle):
+        return self.windows.get(handle)
+
+    def watch(self, on_change):
+        self.on_change = on_change
+
+    def foreground(self):
+        return self.focused
+
+    def move(self, title, rect):
+        """Simulate a move/resize event"""
+        self.windows[title] = rect
+        if self.on_change is not None:
+            self.on_change(title)
+
+class Win32WindowBackend:
+    """Finds windows through user32 and reports moves via a WinEvent hook"""
+    # Titles match like AutoHotkey's (title starts with the text) plus these ahk_ criteria;
+    # any other ahk_ word raises ValueError rather than quietly matching some other window
+    CRITERIA = ("id", "pid", "exe", "class")
+    PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+    EVENT_OBJECT_DESTROY = 0x8001
+    EVENT_OBJECT_LOCATIONCHANGE = 0x800B
+    OBJID_WINDOW = 0
+
+    def __init__(self):
+        import ctypes
+        from ctypes import wintypes
+        
+        self.ctypes = ctypes
+        self.wintypes = wintypes
+        self.user32 = ctypes.windll.user32
+        self.enum_proc = ctypes.WINFUNCTYPE(wintypes.BOOL, wintypes.HWND, wintypes.LPARAM)
+        self.event_proc = ctypes.WINFUNCTYPE(None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+                                             wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD)
+        self.hook_callback = None  # Kept alive for as long as the hook exists
+
+    @classmethod
+    def parse_title(cls, title):
+        """Split an AutoHotkey window title into its text and a {kind: value} dict of criteria"""
+        text, *parts = (" " + title).split(" ahk_")
+        criteria = {}
+        for part in parts:
+            kind, _, value = part.partition(" ")
+            if kind not in cls.CRITERIA:
+                raise ValueError(f"Unsupported window criterion ahk_{kind} in '{title}'")
+            criteria[kind] = value.strip()
+        return text[1:], criteria
+
+    def process_name(self, pid):
+        """File name of a process's executable, or "" if it can't be read"""
+        kernel32 = self.ctypes.windll.kernel32
+        process = kernel32.OpenProcess(self.PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not process:
+            return ""
+        try:
+            buffer = self.ctypes.create_unicode_buffer(1024)
+            size = self.wintypes.DWORD(len(buffer))
+            if not kernel32.QueryFullProcessImageNameW(process, 0, buffer, self.ctypes.byref(size)):
+                return ""
+            return buffer.value
+        finally:
+            kernel32.CloseHandle(process)
+
+    def find(self, title):
+        text, criteria = self.parse_title(title)
+        if "id" in criteria:
+            return int(criteria["id"], 0)
+        
+        wanted_pid = int(criteria["pid"]) if "pid" in criteria else None
+        wanted_exe = criteria.get("exe", "").lower()
+        wanted_class = criteria.get("class")
+        found = []
+        
+        def callback(hwnd, lparam):
+            if not self.user32.IsWindowVisible(hwnd):
+                return True
+            length = self.user32.GetWindowTextLengthW(hwnd)
+            buffer = self.ctypes.create_unicode_buffer(length + 1)
+            self.user32.GetWindowTextW(hwnd, buffer, length + 1)
+            if not buffer.value.startswith(text):
+                return True
+            if wanted_class is not None:
+                name = self.ctypes.create_unicode_buffer(256)
+                self.user32.GetClassNameW(hwnd, name, 256)
+                if name.value != wanted_class:
+                    return True
+            if wanted_pid is not None or wanted_exe:
+                pid = self.wintypes.DWORD()
+                self.user32.GetWindowThreadProcessId(hwnd, self.ctypes.byref(pid))
+                if wanted_pid is not None and pid.value != wanted_pid:
+                    return True
+                if wanted_exe:
+                    path = self.process_name(pid.value).lower()
+                    # Like AutoHotkey, ahk_exe takes a file name or a full path
+                    if wanted_exe not in (path, os.path.basename(path)):
+                        return True
+            found.append(hwnd)
+            return False
+        
+        self.user32.EnumWindows(self.enum_proc(callback), 0)
+        return found[0] if found else None
+
+    def client_rect(self, hwnd):
+        rect = self.wintypes.RECT()
+        origin = self.wintypes.POINT(0, 0)
+        if not self.user32.GetClientRect(hwnd, self.ctypes.byref(rect)):
+            return None
+        self.user32.ClientToScreen(hwnd, self.ctypes.byref(origin))
+        return (origin.x, origin.y, origin.x + rect.right, origin.y + rect.bottom)
+
+    def foreground(self):
+        return self.user32.GetForegroundWindow() or None
+
+    def watch(self, on_change):
+        """Call on_change(hwnd) from a hook thread whenever a window moves, resizes or closes"""
+        def callback(hook, event, hwnd, id_object, id_child, thread, time_ms):
+            if id_object == self.OBJID_WINDOW and hwnd:
+                on_change(hwnd)
+        self.hook_callback = self.event_proc(callback)
+        
+        def pump():
+            for event in (self.EVENT_OBJECT_DESTROY, self.EVENT_OBJECT_LOCATIONCHANGE):
+                self.user32.SetWinEventHook(event, event, 0, self.hook_callback, 0, 0, 0)
+            message = self.wintypes.MSG()
+            while self.user32.GetMessageW(self.ctypes.byref(message), 0, 0, 0) > 0:
+                self.user32.TranslateMessage(self.ctypes.byref(message))
+                self.user32.DispatchMessageW(self.ctypes.byref(message))
+        
+        thread = threading.Thread(target=pump)
+        thread.daemon = True
+        thread.start()
+
+class WindowLocator:
+    """Window title -> client rectangle lookup, cached until the backend reports the window moved or closed"""
+    MISSING_RETRY = 2.0  # Seconds between lookups of a title that wasn't found
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.lock = threading.Lock()
+        self.cache = {}  # title -> (handle, rect)
+        self.missing = {}  # title -> time of the last failed lookup
+        backend.watch(self.invalidate_window)
+
+    def rect(self, title):
+        with self.lock:
+            entry = self.cache.get(title)
+            if entry is not None:
+                return entry[1]
+            if time.monotonic() - self.missing.get(title, -self.MISSING_RETRY) < self.MISSING_RETRY:
+                return None
+        
+        metrics.inc("window_lookups_total")
+        handle = self.backend.find(title)
+        rect = self.backend.client_rect(handle) if handle is not None else None
+        with self.lock:
+            if rect is None:
+                self.missing[title] = time.monotonic()
+            else:
+                self.missing.pop(title, None)
+                self.cache[title] = (handle, rect)
+        return rect
+
+    def handle(self, title):
+        """Window handle for a title, through the same cache as rect()"""
+        self.rect(title)
+        with self.lock:
+            entry = self.cache.get(title)
+        return entry[0] if entry is not None else None
+
+    def foreground(self):
+        """Handle of the window that has keyboard focus"""
+        return self.backend.foreground()
+
+    def invalidate_window(self, handle):
+        """Forget every cached rectangle belonging to a window handle"""
+        with self.lock:
+            for title in [t for t, (h, _) in self.cache.items() if h == handle]:
+                del self.cache[title]
+
+    def invalidate(self):
+        with self.lock:
+            self.cache.clear()
+            self.missing.clear()
+
+window_locator = None
+
+def get_window_locator():
+    """Shared WindowLocator, using user32 on Windows and the stub elsewhere"""
+    global window_locator
     
-    last_jump_time = 0
-    while running:
+    if window_locator is None:
+        backend = Win32WindowBackend() if sys.platform == "win32" else StubWindowBackend()
+        window_locator = WindowLocator(backend)
+    return window_locator
+
+class ActivityModel:
+    """Tracks each session's last input against Roblox's idle kick, so jumps are only sent when needed"""
+    SYNTHETIC_GRACE = 0.5  # seconds after sending an action during which key events are its own
+
+    def __init__(self, windows, idle_kick=1200.0, margin=120.0, clock=time.monotonic):
+        self.windows = windows
+        self.idle_kick = idle_kick
+        self.margin = margin
+        self.clock = clock
+        self.last_input = {}  # window handle -> time of the last real key press in it
+        self.last_action = {}  # session name -> time the script last sent it an action
+        self.synthetic_until = 0.0
+        self.hook = None
+
+    def key_pressed(self):
+        """Credit a real key press to the focused window (called from the keyboard hook thread)"""
+        now = self.clock()
+        if now >= self.synthetic_until:
+            self.last_input[self.windows.foreground()] = now
+
+    def idle(self, session):
+        """Seconds since the session's window last had input, real or sent"""
+        handle = self.windows.handle(session.window_title)
+        last = max(self.last_action.get(session.name, -math.inf),
+                   self.last_input.get(handle, -math.inf) if handle is not None else -math.inf)
+        return self.clock() - last
+
+    def due(self, session):
+        """True once session is within margin seconds of the kick, or nothing is known about it yet"""
+        return self.idle(session) >= self.idle_kick - self.margin
+
+    @contextlib.contextmanager
+    def sending(self, session):
+        """Mark the input sent in the block as the script's own, as activity for session"""
+        self.synthetic_until = math.inf
+        try:
+            yield
+        finally:
+            now = self.clock()
+            self.synthetic_until = now + self.SYNTHETIC_GRACE
+            self.last_action[session.name] = now
+
+    def start(self):
+        """Start watching real key presses"""
         try:
-            # Debug pixel info occasionally
-            if time.time() % 10 < 0.1:  # Print every ~10 seconds
-                show_pixel_info()
+            import keyboard
             
-            # Check if it's time to jump
-            current_time = time.time()
-            if current_time - last_jump_time >= JUMP_INTERVAL:
-                pyrobloxbot.jump()  # Use the jump function from pyrobloxbot
-                last_jump_time = current_time
-                print("Jumped")
+            def on_key(event):
+                if event.event_type == keyboard.KEY_DOWN:
+                    self.key_pressed()
+            self.hook = keyboard.hook(on_key)
+        except Exception as e:
+            log.warning("Warning: Can't watch key presses (%s), only the script's own input counts as activity", e)
+
+    def stop(self):
+        if self.hook is not None:
+            import keyboard
+            keyboard.unhook(self.hook)
+            self.hook = None
+
+def build_activity_model(config, windows=None):
+    """ActivityModel from [General] idle_kick_seconds and idle_margin, or None when it's off"""
+    idle_kick = config.getfloat("General", "idle_kick_seconds", fallback=0)
+    if idle_kick <= 0:
+        return None
+    return ActivityModel(windows or get_window_locator(), idle_kick,
+                         config.getfloat("General", "idle_margin", fallback=120))
+
+class Session:
+    """One Roblox window watched by the orchestrator, with its own profile and window position"""
+    def __init__(self, name, profile, offset=(0, 0), window_title=None, rules=()):
+        self.name = name
+        self.profile = profile
+        self.offset = offset
+        self.window_title = window_title or profile.window_title
+        self.relative = profile.coordinates == "client"  # Follows the window; otherwise fixed at offset
+        # The disconnect dialog is group 0 of the matcher, the session's rules follow
+        self.rules = [rule for rule in rules if rule.profile in ("", profile.name)]
+        self.matcher = ProbeMatcher.combine([profile.build_matcher()] + [rule.matcher for rule in self.rules])
+        self.thresholds = np.array([profile.match_threshold] + [rule.threshold for rule in self.rules])
+        self.scores = np.zeros(len(self.thresholds))
+        self.rule_cooldowns = [0.0] * len(self.rules)
+        self.window_rect = None
+        self.origin = None
+        self.last_sentinels = None
+        self.unchanged_checks = 0
+        self.confidence = 0.0
+        self.cooldown_until = 0.0
+        self.result_seq = 0  # Last detection worker result seen for this session
+        self.result_time = 0.0  # When result_seq last advanced
+        self.excluded = None  # excluded_rects the matcher was last masked with
+        if not self.relative:
+            self.set_origin(offset)
+
+    def set_origin(self, origin):
+        """Place the profile's coordinates with their (0, 0) at origin on screen"""
+        ox, oy = origin
+        self.origin = origin
+        self.points = [(x + ox, y + oy) for x, y in self.matcher.points]
+        self.check_pixel = (self.profile.pixel_to_check[0] + ox, self.profile.pixel_to_check[1] + oy)
+        self.button = (self.profile.button_pixel[0] + ox, self.profile.button_pixel[1] + oy)
+        self.last_sentinels = None
+        self.excluded = None
+
+    def follow_window(self, rect):
+        """Track the client rectangle of a window-relative session; returns True if it moved"""
+        if rect == self.window_rect:
+            return False
+        self.window_rect = rect
+        if rect is None:
+            self.origin = None
+            return True
+        left, top, right, bottom = rect
+        self.set_origin((left, top))
+        if any(not (left <= x < right and top <= y < bottom) for x, y in self.points):
+            log.warning("Warning: Probes for session %s fall outside its window %s", self.name, rect)
+        return True
+
+    def update(self, frame):
+        """Score the shared frame for this window; returns True if its probes changed"""
+        if self.excluded is not excluded_rects:
+            self.exclude(excluded_rects)
+        
+        # Shift the frame so the matcher can keep working in profile coordinates
+        frame = Frame(frame.pixels, frame.left - self.origin[0], frame.top - self.origin[1])
+        sentinels = self.matcher.read_sentinels(frame)
+        changed = self.last_sentinels is None or not np.array_equal(sentinels, self.last_sentinels)
+        self.last_sentinels = sentinels
+        
+        # While the sentinels are unchanged the last score stands, short of a full check every
+        # FULL_CHECK_EVERY frames; only patches have pixels besides the sentinels to skip
+        if not changed:
+            self.unchanged_checks += 1
+            if self.unchanged_checks < FULL_CHECK_EVERY:
+                metrics.inc("unchanged_checks_total", session=self.name)
+                return False
+        self.unchanged_checks = 0
+        
+        colors = sentinels if self.matcher.sentinels_cover_all else self.matcher.read(frame)
+        if self.rules:
+            self.scores = self.matcher.score_groups(colors)
+            self.confidence = float(self.scores[0])
+        else:
+            self.confidence = self.matcher.score_colors(colors)
+        return changed
+
+    def exclude(self, rects):
+        """Mask out probes under screen rects such as the overlay, forcing a full re-check"""
+        ox, oy = self.origin
+        hidden = self.matcher.exclude([(l - ox, t - oy, r - ox, b - oy) for l, t, r, b in rects])
+        if hidden == len(self.matcher.xs):
+            log.warning("Warning: The overlay covers every probe of session %s", self.name)
+        self.excluded = rects
+        self.last_sentinels = None
+
+    @property
+    def detected(self):
+        return self.confidence >= self.profile.match_threshold
+
+    def fired_rules(self):
+        """Indices of the rules whose screens are showing"""
+        return np.flatnonzero(self.scores[1:] >= self.thresholds[1:])
+
+def load_sessions(config):
+    """Sessions listed under [General] sessions, or a single one for the active profile"""
+    names = [n.strip() for n in config.get("General", "sessions", fallback="").split(",") if n.strip()]
+    if not names:
+        profile = ACTIVE_PROFILE or Profile("default", {})
+        return [Session(profile.name, profile, rules=load_rules(config))]
+    
+    active_profile = config.get("General", "active_profile", fallback="3440x1440")
+    rules = load_rules(config)
+    sessions = []
+    for name in names:
+        section_name = f"Session {name}"
+        if not config.has_section(section_name):
+            log.warning("Warning: Session %s has no [%s] section, skipping", name, section_name)
+            continue
+        section = config[section_name]
+        profile_name = section.get("profile", active_profile)
+        if not config.has_section(profile_name):
+            log.warning("Warning: Profile %s for session %s not found, skipping", profile_name, name)
+            continue
+        offset = (int(section.get("window_x", "0")), int(section.get("window_y", "0")))
+        sessions.append(Session(name, config_store.profile(profile_name), offset,
+                                section.get("window_title"), rules))
+    return sessions
+
+class Supervisor:
+    """Watchdog for the AFK loop, input actions and detection workers, run on its own thread"""
+    def __init__(self, interval=WATCHDOG_INTERVAL, clock=time.monotonic):
+        self.interval = interval
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.watches = {}  # name -> [timeout, recover, last beat, owner]
+        self.stalls = {}  # name -> time the stall was noticed, until the next beat
+        self.thread = None
+        self.stop_event = threading.Event()
+
+    def watch(self, name, timeout, recover=None, owner=None):
+        """Start expecting a beat from name at least every timeout seconds"""
+        with self.lock:
+            self.watches[name] = [timeout, recover, self.clock(), owner]
+        self.start()
+
+    def unwatch(self, name, owner=None):
+        """Stop watching name, unless an owner is given and it didn't set the watch up"""
+        with self.lock:
+            watch = self.watches.get(name)
+            if watch is not None and (owner is None or watch[3] is owner):
+                del self.watches[name]
+
+    def beat(self, name):
+        """Report progress for name, recording how long it took to recover if it was stalled"""
+        now = self.clock()
+        with self.lock:
+            watch = self.watches.get(name)
+            if watch is not None:
+                watch[2] = now
+            if not self.stalls:
+                return
+            stalled_at = self.stalls.pop(name, None)
+        if stalled_at is not None:
+            metrics.observe("recovery_seconds", now - stalled_at, component=name)
+            log.info(f"Watchdog: {name} recovered after {now - stalled_at:.1f} s")
+
+    def check(self):
+        """Declare and recover stalls; returns the names of the stalled components"""
+        now = self.clock()
+        stalled = []
+        with self.lock:
+            for name, watch in self.watches.items():
+                timeout, recover, last, _ = watch
+                age = now - last
+                metrics.set("heartbeat_age_seconds", age, component=name)
+                if age <= timeout:
+                    continue
+                watch[2] = now  # Recovery gets a full timeout before it's retried
+                if name not in self.stalls:
+                    self.stalls[name] = now
+                    metrics.observe("stall_detect_seconds", age, component=name)
+                stalled.append((name, age, recover))
+        
+        for name, age, recover in stalled:
+            metrics.inc("stalls_total", component=name)
+            log.error("Watchdog: %s made no progress for %.1f s, recovering", name, age)
+            if recover is not None:
+                try:
+                    recover()
+                except Exception as e:
+                    log.error("Watchdog: recovering %s failed: %s", name, e)
+        return [name for name, _, _ in stalled]
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            self.check()
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name="watchdog")
+            self.thread.daemon = True
+            self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+def get_supervisor():
+    """Shared watchdog, or None when watchdog = false in config.ini"""
+    global supervisor
+    
+    if supervisor is None and load_config().getboolean("General", "watchdog", fallback=True):
+        supervisor = Supervisor()
+    return supervisor
+
+class InputQueue:
+    """Runs input actions one at a time on its own thread so windows never fight over focus"""
+    PRIORITIES = {"click": 0, "send": 0, "jump": 1}  # Reconnect clicks go ahead of anti-idle jumps
+
+    def __init__(self, max_pending=16, supervisor=None, timeout=15.0):
+        self.max_pending = max_pending
+        self.supervisor = supervisor
+        self.timeout = timeout  # An action running longer is stuck, and the supervisor restarts the queue
+        self.pending = {}  # key -> heap entry [priority, seq, key, name, action, queued_at]
+        self.heap = []
+        self.seq = 0
+        self.closed = False
+        self.generation = 0
+        self.condition = threading.Condition()
+        self.thread = None
+        self.start_thread()
+
+    def start_thread(self):
+        self.thread = threading.Thread(target=self.run, args=(self.generation,))
+        self.thread.daemon = True
+        self.thread.start()
+
+    def restart(self):
+        """Leave the stuck action to its thread and carry on with the queue on a new one"""
+        stuck = self.thread
+        with self.condition:
+            self.generation += 1
+        if self.supervisor is not None:
+            self.supervisor.unwatch("input", self)  # Watched again once the new thread takes an action
+        kill_input_worker()  # Fails the command the old thread waits on; it exits after its action
+        stuck.join(1.0)
+        self.start_thread()
+        metrics.inc("input_restarts_total")
+
+    def put(self, name, action, key=None):
+        """Queue an action without blocking; returns False if it was dropped for backpressure or the queue is closed"""
+        key = key or name
+        priority = self.PRIORITIES.get(name, len(self.PRIORITIES))
+        with self.condition:
+            if self.closed:
+                return False
+            entry = self.pending.get(key)
+            if entry is not None:
+                # Replaces the waiting action with this key, so a slow backend can't pile up jumps
+                entry[4] = action  # Keeps its place in line
+                metrics.inc("input_coalesced_total", action=name)
+                return True
             
-            # Check pixel conditions and click if needed
-            if (check_pixel_color(*PIXEL_TO_CHECK, EXPECTED_COLOR) and 
-                check_pixel_color(*BUTTON_PIXEL, EXPECTED_BUTTON_COLOR)):
-                run_ahk_script()
-                time.sleep(0.5)  # Short delay after clicking
+            if len(self.pending) >= self.max_pending:  # Drop the lowest-priority newest action
+                worst = max(self.pending.values(), key=lambda e: (e[0], e[1]))
+                if worst[0] <= priority:
+                    metrics.inc("input_dropped_total", action=name)
+                    return False
+                worst[4] = None  # Left in the heap, skipped when popped
+                del self.pending[worst[2]]
+                metrics.inc("input_dropped_total", action=worst[3])
             
-            time.sleep(0.1)  # Small delay to prevent high CPU usage
+            self.seq += 1
+            entry = [priority, self.seq, key, name, action, time.perf_counter()]
+            self.pending[key] = entry
+            heapq.heappush(self.heap, entry)
+            metrics.set("input_pending", len(self.pending))
+            self.condition.notify()
+            return True
+
+    def run(self, generation=0):
+        while True:
+            with self.condition:
+                while not self.heap and not self.closed and generation == self.generation:
+                    self.condition.wait()
+                if not self.heap or generation != self.generation:
+                    break
+                entry = heapq.heappop(self.heap)
+                if entry[4] is None:
+                    continue
+                del self.pending[entry[2]]
+                metrics.set("input_pending", len(self.pending))
             
-        except Exception as e:
-            print(f"Error in AFK loop: {e}")
-            time.sleep(1)  # Delay on error
+            name, action, queued_at = entry[3:]
+            metrics.observe("input_wait_seconds", time.perf_counter() - queued_at, action=name)
+            if self.supervisor is not None:
+                self.supervisor.watch("input", self.timeout, self.restart, owner=self)
+            try:
+                with metrics.timer("input_seconds", action=name):
+                    action()
+            except Exception as e:
+                metrics.inc("errors_total", action=name)
+                log.error("Error in %s action: %s", name, e)
+            if self.supervisor is not None and generation == self.generation:
+                self.supervisor.beat("input")
+                self.supervisor.unwatch("input", self)
+
+    def close(self):
+        """Drop the pending actions and stop the thread after the running one"""
+        with self.condition:
+            self.closed = True
+            self.heap.clear()
+            self.pending.clear()
+            metrics.set("input_pending", 0)
+            self.condition.notify()
+        if self.supervisor is not None:
+            self.supervisor.unwatch("input", self)
+
+class GameInput:
+    """Input sink that sends jumps and clicks to the real Roblox windows"""
+    def focus(self, session):
+        worker = get_input_worker()
+        if worker is not None:
+            worker.activate(session.window_title)
+
+    def jump(self, session):
+        import pyrobloxbot
+        pyrobloxbot.jump()  # Use the jump function from pyrobloxbot
+        log.info(f"Jumped ({session.name})")
+
+    def click(self, session):
+        return run_ahk_script(session.button, session.window_title)
+
+    def click_at(self, session, point):
+        return run_ahk_script(point, session.window_title)
+
+    def send(self, session, keys):
+        worker = get_input_worker()
+        if worker is not None:
+            worker.activate(session.window_title)
+            worker.send_keys(keys)
+            log.info(f"Sent {keys} ({session.name})")
+
+# Detection worker processes
+
+# Columns of the shared result table, one row per session
+RESULT_SEQ = 0  # Odd while a worker is writing the row
+RESULT_CONFIDENCE = 1
+RESULT_CHANGED = 2
+RESULT_ERRORS = 3
+RESULT_RECT = slice(4, 8)  # Window client rectangle, written by the main process
+RESULT_RECT_VALID = 8
+RESULT_COLUMNS = 9
+MAX_EXCLUDED_RECTS = 4  # Overlay rects handed to the detection workers
+
+def result_table(results):
+    """NumPy view of a shared result array"""
+    return np.frombuffer(results, dtype=np.float64).reshape(-1, RESULT_COLUMNS)
+
+def detection_worker(specs, results, beats, index, excluded, stop_event, config_file, capture_factory=None):
+    """Capture-and-detect loop for a group of sessions, run in a worker process"""
+    # specs: (slot, session name, profile name, profile values, offset, window title) per session.
+    # beats[index] counts completed checks; excluded holds excluded_rects as a count, then the rects.
+    global CONFIG_FILE, excluded_rects
+    CONFIG_FILE = config_file  # Reference patch paths are relative to it
+    
+    table = result_table(results)
+    group = [(slot, Session(name, Profile(profile_name, values), offset, title))
+             for slot, name, profile_name, values, offset, title in specs]
+    sampler = PixelSampler(capture_factory() if capture_factory is not None else None)
+    scheduler = Scheduler()
+    points = None
+    
+    def check():
+        global excluded_rects
+        nonlocal points
+        rects = tuple(tuple(int(v) for v in excluded[1 + 4 * i:5 + 4 * i]) for i in range(int(excluded[0])))
+        if rects != excluded_rects:
+            excluded_rects = rects
+        for slot, session in group:
+            if session.relative:
+                row = table[slot]
+                rect = tuple(int(v) for v in row[RESULT_RECT]) if row[RESULT_RECT_VALID] else None
+                if session.follow_window(rect):
+                    points = None
+        active = [(slot, session) for slot, session in group if session.origin is not None]
+        if not active:
+            beats[index] += 1
+            return False
+        if points is None:
+            points = [p for _, session in active for p in session.points]
+        
+        try:
+            frame = sampler.grab(points)
+        except Exception:
+            for slot, _ in group:
+                table[slot][RESULT_ERRORS] += 1
+            raise
+        
+        any_changed = False
+        for slot, session in active:
+            changed = session.update(frame)
+            any_changed = any_changed or changed or session.detected
+            row = table[slot]
+            row[RESULT_SEQ] += 1
+            row[RESULT_CONFIDENCE] = session.confidence
+            row[RESULT_CHANGED] = 1.0 if changed else 0.0
+            row[RESULT_SEQ] += 1
+        beats[index] += 1
+        return any_changed
+    
+    def check_stop():
+        if stop_event.is_set():
+            scheduler.stop()
+    
+    profiles = [session.profile for _, session in group]
+    scheduler.every("check", min(p.check_interval for p in profiles), check,
+                    max_period=min(p.max_check_interval for p in profiles),
+                    backoff=min(p.check_backoff for p in profiles))
+    scheduler.every("stop", 0.2, check_stop)
+    scheduler.run()
+
+class DetectionPool:
+    """Runs capture and detection for the sessions in worker processes, off the main process's GIL"""
+    def __init__(self, sessions, workers, capture_factory=None):
+        # Spawn so workers never inherit Qt or hook threads
+        context = multiprocessing.get_context("spawn")
+        self.context = context
+        self.results = context.RawArray("d", len(sessions) * RESULT_COLUMNS)  # Read without pickling
+        self.table = result_table(self.results)
+        self.stop_event = context.Event()
+        self.capture_factory = capture_factory  # Picklable; called in each worker to make its capture
+        self.excluded = context.RawArray("d", 1 + 4 * MAX_EXCLUDED_RECTS)
+        self.excluded_rects = ()
+        
+        workers = max(1, min(workers, len(sessions)))
+        self.beats = context.RawArray("d", workers)
+        self.groups = [[] for _ in range(workers)]  # Sessions dealt round-robin
+        for slot, session in enumerate(sessions):
+            self.groups[slot % workers].append((slot, session.name, session.profile.name,
+                                                session.profile.section, session.offset,
+                                                session.window_title))
+        self.processes = [self.spawn(index) for index in range(workers)]
+        log.info(f"Started {workers} detection worker(s) for {len(sessions)} session(s)")
+
+    def spawn(self, index):
+        process = self.context.Process(target=detection_worker,
+                                       args=(self.groups[index], self.results, self.beats, index,
+                                             self.excluded, self.stop_event, CONFIG_FILE,
+                                             self.capture_factory),
+                                       daemon=True)
+        process.start()
+        return process
+
+    def restart(self, index):
+        """Replace one worker process, leaving the others running"""
+        process = self.processes[index]
+        process.terminate()
+        process.join(timeout=2)
+        for slot, *_ in self.groups[index]:
+            row = self.table[slot]
+            if row[RESULT_SEQ] % 2:
+                row[RESULT_SEQ] += 1  # It was killed mid-write
+        self.processes[index] = self.spawn(index)
+
+    def set_window(self, slot, rect):
+        """Hand a session's window rectangle to its worker"""
+        row = self.table[slot]
+        if rect is None:
+            row[RESULT_RECT_VALID] = 0.0
+        else:
+            row[RESULT_RECT] = rect
+            row[RESULT_RECT_VALID] = 1.0
+
+    def set_excluded(self, rects):
+        """Hand excluded_rects to the workers"""
+        if rects is self.excluded_rects:
+            return
+        self.excluded_rects = rects
+        rects = rects[:MAX_EXCLUDED_RECTS]
+        self.excluded[0] = 0.0
+        for i, rect in enumerate(rects):
+            self.excluded[1 + 4 * i:5 + 4 * i] = rect
+        self.excluded[0] = len(rects)
+
+    def read(self, slot, retries=100):
+        """Consistent (seq, confidence, changed, errors) for one session, or None if it stays mid-write"""
+        row = self.table[slot]
+        for _ in range(retries):
+            seq = row[RESULT_SEQ]
+            if seq % 2 == 0:
+                values = (int(seq), float(row[RESULT_CONFIDENCE]), bool(row[RESULT_CHANGED]), int(row[RESULT_ERRORS]))
+                if row[RESULT_SEQ] == seq:
+                    return values
+            time.sleep(0)
+        return None
+
+    def close(self):
+        self.stop_event.set()
+        for process in self.processes:
+            process.join(timeout=2)
+            if process.is_alive():
+                process.terminate()
+
+# Frame recording
+
+# A recording is RECORDING_MAGIC, a length-prefixed JSON header naming the sessions, then one
+# record per check: a RECORD_HEADER, a RECORD_SESSION per session, and the pixels - the whole
+# region for a keyframe, only the flat indices and colors of changed pixels for a delta
+RECORDING_MAGIC = b"RBXREC\x00\x01"
+# size, kind, time, left, top, width, height, capture s, match s, sessions
+RECORD_HEADER = struct.Struct("<IBdiiHHffH")
+RECORD_KEYFRAME = 0
+RECORD_DELTA = 1
+NO_ORIGIN = -2 ** 31
+# Per-session decision: confidence, detected, origin x, origin y
+RECORD_SESSION = np.dtype([("confidence", "<f4"), ("detected", "u1"), ("x", "<i4"), ("y", "<i4")])
+
+class FrameRecorder:
+    """Appends every checked frame and its detection results to a recording file"""
+    def __init__(self, path, sessions, keyframe_interval=600.0, max_bytes=50000000, backups=3,
+                 clock=time.monotonic, max_pending=256):
+        self.path = path
+        self.keyframe_interval = keyframe_interval
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.clock = clock
+        self.file = None
+        self.file_info = None  # Header of the open file, only used on the writer thread
+        self.file_start = 0  # Where this run started writing records; only rotated once past it
+        # Records are encoded here and written on this thread; when it falls behind they are dropped
+        self.writer = BackgroundWriter("recorder", max_pending)
+        self.open(sessions)
+
+    @staticmethod
+    def layout(sessions):
+        """What the file header records about the sessions"""
+        return [{"name": s.name, "profile": s.profile.name, "section": s.profile.section,
+                 "offset": list(s.offset)} for s in sessions]
+
+    def open(self, sessions):
+        """Start recording sessions; the file is opened, or appended to, on the writer thread"""
+        self.info = {"version": SCRIPT_VERSION, "sessions": self.layout(sessions)}
+        self.sessions = sessions
+        self.decisions = np.zeros(len(sessions), dtype=RECORD_SESSION)
+        self.previous = None
+        self.last_keyframe = None
+        self.writer.submit(self.open_file, self.info, block=True)
+
+    def open_file(self, info):
+        """Append to the file if it records the same sessions, otherwise rotate it and start a new one"""
+        self.file_info = info
+        end = self.resume_offset(info)
+        if end is None:
+            if os.path.exists(self.path):
+                self.shift()
+            self.file = open(self.path, "wb")
+            header = json.dumps(info).encode()
+            self.file.write(RECORDING_MAGIC + struct.pack("<I", len(header)) + header)
+            self.file_start = self.file.tell()
+        else:
+            self.file = open(self.path, "r+b")
+            self.file.truncate(end)  # Drop a record cut short by a crash
+            self.file.seek(end)
+            self.file_start = end
+
+    def resume_offset(self, info):
+        """Where to append to the existing file, or None if it can't be continued"""
+        try:
+            recording = Recording(self.path)
+        except (OSError, ValueError):
+            return None
+        try:
+            if recording.info.get("sessions") != info["sessions"]:
+                return None
+            return recording.end()
+        finally:
+            recording.close()
+
+    def shift(self):
+        """Rename <path> to <path>.1, <path>.1 to <path>.2 and so on, dropping the oldest"""
+        if self.backups < 1:
+            os.remove(self.path)
+            return
+        for generation in range(self.backups - 1, 0, -1):
+            older = f"{self.path}.{generation}"
+            if os.path.exists(older):
+                os.replace(older, f"{self.path}.{generation + 1}")
+        os.replace(self.path, self.path + ".1")
+
+    def close_file(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def set_sessions(self, sessions):
+        """Record new sessions, keeping the current file if their layout is the same"""
+        if self.layout(sessions) == self.info["sessions"]:
+            self.sessions = sessions
+            return
+        self.writer.submit(self.close_file, block=True)
+        self.open(sessions)
+
+    def write(self, frame, capture_seconds=0.0, match_seconds=0.0):
+        """Encode one tick, the frame, each session's decision and the timings, and queue it"""
+        for i, session in enumerate(self.sessions):
+            entry = self.decisions[i]
+            entry["confidence"] = session.confidence
+            entry["detected"] = session.detected
+            entry["x"], entry["y"] = session.origin if session.origin is not None else (NO_ORIGIN, NO_ORIGIN)
+        
+        pixels = frame.pixels
+        height, width = pixels.shape[:2]
+        previous = self.previous
+        now = self.clock()
+        if (previous is None or previous.shape != pixels.shape
+                or now - self.last_keyframe >= self.keyframe_interval):
+            kind = RECORD_KEYFRAME
+            payload = [np.ascontiguousarray(pixels).tobytes()]
+            self.previous = pixels.copy()
+            self.last_keyframe = now
+        else:
+            kind = RECORD_DELTA
+            # Changed bytes -> changed pixels (np.any over the color axis is far slower)
+            changed = np.flatnonzero(pixels != previous) // 3
+            if len(changed):
+                changed = changed[np.concatenate(([True], changed[1:] != changed[:-1]))]
+            colors = pixels.reshape(-1, 3)[changed]
+            payload = [struct.pack("<I", len(changed)), changed.astype("<u4").tobytes(), colors.tobytes()]
+            previous.reshape(-1, 3)[changed] = colors
+        
+        decisions = self.decisions.tobytes()
+        size = RECORD_HEADER.size + len(decisions) + sum(len(part) for part in payload)
+        header = RECORD_HEADER.pack(size, kind, time.time(), frame.left, frame.top, width, height,
+                                    capture_seconds, match_seconds, len(self.decisions))
+        if self.writer.submit(self.append, [header, decisions] + payload, kind == RECORD_KEYFRAME):
+            metrics.inc("recorded_bytes_total", size)
+        else:
+            metrics.inc("recorder_dropped_total")
+            self.previous = None  # The next delta would build on the dropped record
+
+    def append(self, parts, keyframe):
+        """Write one record (on the writer thread); files are rotated before a keyframe"""
+        if self.file is None:
+            return
+        if keyframe and self.file.tell() > max(self.max_bytes, self.file_start):
+            self.close_file()
+            self.shift()
+            self.open_file(self.file_info)
+        for part in parts:
+            self.file.write(part)
+        if keyframe:
+            self.file.flush()
+
+    def close(self):
+        """Write out the queued records, close the file and stop the writer"""
+        self.writer.submit(self.close_file, block=True)
+        self.writer.close()
+
+class RecordedFrame:
+    """One tick read back from a recording"""
+    def __init__(self, frame, time, capture_seconds, match_seconds, decisions):
+        self.frame = frame
+        self.time = time
+        self.capture_seconds = capture_seconds
+        self.match_seconds = match_seconds
+        self.decisions = decisions  # RECORD_SESSION array, one entry per session
+
+class Recording:
+    """Reads a FrameRecorder file through a memory map, yielding a RecordedFrame per tick"""
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.map = None
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            if self.map[:len(RECORDING_MAGIC)] != RECORDING_MAGIC:
+                raise ValueError(f"{path} is not a recording")
+            (length,) = struct.unpack_from("<I", self.map, len(RECORDING_MAGIC))
+            start = len(RECORDING_MAGIC) + 4
+            self.info = json.loads(bytes(self.map[start:start + length]))
+            self.start = start + length
+        except struct.error as e:
+            self.close()
+            raise ValueError(f"{path} has a truncated header") from e
+        except Exception:
+            self.close()
+            raise
+
+    def sessions(self):
+        """Rebuild the recorded sessions, ready to be fed frames with replay()"""
+        return [Session(s["name"], Profile(s["profile"], s["section"]), tuple(s["offset"]))
+                for s in self.info["sessions"]]
+
+    def end(self):
+        """Offset just past the last complete record"""
+        offset = self.start
+        while offset + RECORD_HEADER.size <= len(self.map):
+            (size,) = struct.unpack_from("<I", self.map, offset)
+            if size < RECORD_HEADER.size or offset + size > len(self.map):
+                break
+            offset += size
+        return offset
+
+    def __iter__(self):
+        data = self.map
+        offset = self.start
+        pixels = None  # One working array, so a yielded frame is only valid until the next
+        while offset + RECORD_HEADER.size <= len(data):
+            (size, kind, when, left, top, width, height,
+             capture_seconds, match_seconds, count) = RECORD_HEADER.unpack_from(data, offset)
+            if offset + size > len(data):
+                break  # Partly written last record
+            position = offset + RECORD_HEADER.size
+            decisions = np.frombuffer(data, dtype=RECORD_SESSION, count=count, offset=position).copy()
+            position += decisions.nbytes
+            
+            if kind == RECORD_KEYFRAME:
+                pixels = np.frombuffer(data, dtype=np.uint8, count=height * width * 3,
+                                       offset=position).reshape(height, width, 3).copy()
+            else:
+                (changed,) = struct.unpack_from("<I", data, position)
+                indices = np.frombuffer(data, dtype="<u4", count=changed, offset=position + 4)
+                colors = np.frombuffer(data, dtype=np.uint8, count=changed * 3,
+                                       offset=position + 4 + changed * 4).reshape(-1, 3)
+                pixels.reshape(-1, 3)[indices] = colors
+            
+            yield RecordedFrame(Frame(pixels, left, top), when, capture_seconds, match_seconds, decisions)
+            offset += size
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+        self.file.close()
+
+def replay(recording, sessions=None):
+    """Run recorded frames back through session detection, yielding (recorded frame, sessions) per tick"""
+    sessions = sessions or recording.sessions()
+    for recorded in recording:
+        for session, decision in zip(sessions, recorded.decisions):
+            if decision["x"] == NO_ORIGIN:
+                continue
+            origin = (int(decision["x"]), int(decision["y"]))
+            if origin != session.origin:
+                session.set_origin(origin)
+            session.update(recorded.frame)
+        yield recorded, sessions
+
+class Orchestrator:
+    """Drives several sessions from one capture per tick, sending all their input through one InputQueue"""
+    def __init__(self, sessions, sampler=None, scheduler=None, inputs=None, sink=None, windows=None,
+                 recorder=None, supervisor=None, loop_timeout=10.0, on_stall=None, activity=None):
+        if not sessions:
+            raise ValueError("Orchestrator needs at least one session")
+        self.windows = windows
+        self.recorder = recorder
+        self.activity = activity  # Skips jumps until a session is close to the idle kick
+        self.supervisor = supervisor  # Beaten by every check ("loop") and by each detection worker
+        self.loop_timeout = loop_timeout
+        self.on_stall = on_stall
+        self.pool = None
+        self.workers = 0
+        self.worker_beats = []
+        self.stalled_workers = set()  # Filled by the watchdog thread, handled by collect()
+        self.sink = sink or GameInput()
+        self.sampler = sampler or PixelSampler(ring=get_frame_ring())
+        self.scheduler = scheduler or Scheduler()
+        self.inputs = inputs or InputQueue(supervisor=supervisor)
+        self.sessions = []
+        self.jump_tasks = []
+        self.last_frame = None
+        self.metrics_writer = None
+        self.set_sessions(sessions)
+
+    def set_sessions(self, sessions, jump_delay=0.0):
+        """Replace the watched sessions and their jump tasks"""
+        for task in self.jump_tasks:
+            task.cancel()
+        self.sessions = sessions
+        self.points = None
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = DetectionPool(sessions, self.workers)
+            self.watch_workers()
+        if self.recorder is not None and self.recorder.sessions is not sessions:
+            self.recorder.set_sessions(sessions)
+        self.jump_tasks = [
+            self.scheduler.every(
+                f"jump {session.name}",
+                session.profile.jump_interval,
+                lambda s=session: self.queue_jump(s),
+                jitter=session.profile.jump_jitter,
+                delay=jump_delay
+            )
+            for session in sessions
+        ]
+
+    def reload_config(self):
+        """Pick up edited coordinates from config.ini without restarting"""
+        if not config_store.poll():
+            return
+        load_pixel_coordinates()
+        sessions = load_sessions(load_config())
+        if sessions:
+            # Carry click cooldowns over so a reload can't cause a double click
+            cooldowns = {session.name: session.cooldown_until for session in self.sessions}
+            for session in sessions:
+                session.cooldown_until = cooldowns.get(session.name, 0.0)
+            self.set_sessions(sessions, jump_delay=min(s.profile.jump_interval for s in sessions))
+            log.info("Configuration changed, sessions reloaded")
+
+    def refresh_windows(self):
+        """Move window-relative sessions to their windows' current client rectangles"""
+        if self.windows is None:
+            self.windows = get_window_locator()
+        for session in self.sessions:
+            if session.relative and session.follow_window(self.windows.rect(session.window_title)):
+                self.points = None
+                if session.window_rect is None:
+                    log.warning("Warning: Window '%s' for session %s not found", session.window_title, session.name)
+        
+        active = [session for session in self.sessions if session.origin is not None]
+        if self.points is None and active:
+            self.points = [p for session in active for p in session.points]
+        return active
+
+    def check(self):
+        """Capture every session's probes at once and queue clicks for detected dialogs"""
+        if self.supervisor is not None:
+            self.supervisor.beat("loop")
+        active = self.refresh_windows()
+        if self.pool is not None:
+            return self.collect()
+        if not active:
+            return False
+        
+        started = time.perf_counter()
+        with metrics.timer("capture_seconds"):
+            frame = self.sampler.grab(self.points)
+        return self.match(active, frame, started)
+
+    async def check_async(self):
+        """Like check(), with the capture on a helper thread so the event loop never waits on it"""
+        if self.supervisor is not None:
+            self.supervisor.beat("loop")
+        active = self.refresh_windows()
+        if self.pool is not None:
+            return self.collect()
+        if not active:
+            return False
+        
+        started = time.perf_counter()
+        with metrics.timer("capture_seconds"):
+            frame = await asyncio.get_running_loop().run_in_executor(None, self.sampler.grab, self.points)
+        return self.match(active, frame, started)
+
+    def match(self, active, frame, started):
+        """Score the active sessions against a frame captured at started and act on the results"""
+        captured = time.perf_counter()
+        self.last_frame = frame
+        metrics.inc("checks_total")
+        
+        changed = False
+        for session in active:
+            with metrics.timer("match_seconds"):
+                changed = session.update(frame) or changed
+            changed = self.handle(session) or changed
+        
+        if self.recorder is not None:
+            self.recorder.write(frame, captured - started, time.perf_counter() - captured)
+        return changed
+
+    def collect(self):
+        """Pick up the latest results from the detection workers, dropping results older than loop_timeout"""
+        for index, process in enumerate(self.pool.processes):
+            if not process.is_alive():
+                self.restart_worker(index, "exited")
+            elif index in self.stalled_workers:
+                self.restart_worker(index, "stopped reporting")
+            beats = self.pool.beats[index]
+            if beats != self.worker_beats[index]:
+                self.worker_beats[index] = beats
+                if self.supervisor is not None:
+                    self.supervisor.beat(f"worker {index}")
+        
+        self.pool.set_excluded(excluded_rects)
+        
+        now = self.scheduler.clock()
+        changed = False
+        for slot, session in enumerate(self.sessions):
+            if session.relative:
+                self.pool.set_window(slot, session.window_rect)
+            result = self.pool.read(slot)
+            if result is not None:
+                metrics.set("worker_errors", result[3], session=session.name)
+            if result is None or result[0] == session.result_seq:  # None while the row is mid-write
+                if now - session.result_time > self.loop_timeout:
+                    session.confidence = 0.0  # Stale
+                continue
+            seq, confidence, session_changed, _ = result
+            session.result_seq = seq
+            session.result_time = now
+            session.confidence = confidence
+            changed = self.handle(session) or session_changed or changed
+        return changed
+
+    def restart_worker(self, index, reason):
+        """Replace one detection worker process"""
+        log.error("Detection worker %d %s, restarting it", index, reason)
+        self.stalled_workers.discard(index)
+        self.pool.restart(index)
+        metrics.inc("worker_restarts_total")
+
+    def watch_workers(self):
+        """Expect a heartbeat from every detection worker of the current pool"""
+        self.worker_beats = [0.0] * len(self.pool.processes)
+        self.stalled_workers.clear()
+        if self.supervisor is None:
+            return
+        for index in range(self.workers):
+            self.supervisor.unwatch(f"worker {index}", self)
+        for index in range(len(self.pool.processes)):
+            # Flagged here, handled on the loop thread by the next collect()
+            self.supervisor.watch(f"worker {index}", self.loop_timeout,
+                                  lambda index=index: self.stalled_workers.add(index), owner=self)
+
+    def handle(self, session):
+        """Queue a click if the session's dialog is detected and act on fired rules; returns whether anything was"""
+        metrics.set("confidence", session.confidence, session=session.name)
+        fired = self.handle_rules(session) if session.rules else False
+        if not session.detected:
+            return fired
+        metrics.inc("detections_total", session=session.name)
+        now = self.scheduler.clock()
+        if now >= session.cooldown_until:
+            session.cooldown_until = now + CLICK_COOLDOWN
+            self.inputs.put("click", lambda s=session: self.click(s), f"click {session.name}")
+        return True
+
+    def handle_rules(self, session):
+        """Queue the actions of the session's rules that fired, each after its cooldown"""
+        fired = session.fired_rules()
+        now = self.scheduler.clock()
+        for index in fired:
+            rule = session.rules[index]
+            metrics.inc("rule_matches_total", rule=rule.name, session=session.name)
+            if now < session.rule_cooldowns[index]:
+                continue
+            session.rule_cooldowns[index] = now + rule.cooldown
+            if rule.action == "log":
+                log.info(f"Rule {rule.name} matched ({session.name})")
+            else:
+                self.inputs.put(rule.action, lambda s=session, r=rule: self.run_rule(s, r),
+                                f"rule {rule.name} {session.name}")
+        return len(fired) > 0
+
+    def run_rule(self, session, rule):
+        """Carry out a rule's action in its session's window"""
+        log.info(f"Rule {rule.name} matched ({session.name}), action: {rule.action} {rule.argument}".rstrip())
+        if rule.action == "click":
+            ox, oy = session.origin
+            with self.sending(session):
+                self.sink.click_at(session, (rule.point[0] + ox, rule.point[1] + oy))
+        elif rule.action == "send":
+            with self.sending(session):
+                self.sink.send(session, rule.argument)
+        elif rule.action == "jump":
+            self.jump(session)
+        metrics.inc("rule_actions_total", rule=rule.name, session=session.name)
+
+    def queue_jump(self, session):
+        """Queue a jump for the session, unless the activity model says it isn't needed yet"""
+        if self.activity is not None and not self.activity.due(session):
+            metrics.inc("jumps_avoided_total", session=session.name)
+            return
+        self.inputs.put("jump", lambda: self.jump(session), f"jump {session.name}")
+
+    def sending(self, session):
+        """Context for sending input to session, which the activity model counts as activity"""
+        if self.activity is None:
+            return contextlib.nullcontext()
+        return self.activity.sending(session)
+
+    def jump(self, session):
+        """Jump in one window, focusing it first when several windows share the desktop"""
+        with self.sending(session):
+            if len(self.sessions) > 1:
+                self.sink.focus(session)
+            self.sink.jump(session)
+        metrics.inc("jumps_total", session=session.name)
+
+    def click(self, session):
+        with self.sending(session):
+            self.sink.click(session)
+        metrics.inc("clicks_total", session=session.name)
+
+    def debug(self):
+        frame = self.last_frame
+        if frame is None:
+            return
+        for session in self.sessions:
+            if session.origin is None:
+                continue
+            log.info(f"Debug - Session {session.name}:")
+            show_pixel_info([frame.color(*session.check_pixel), frame.color(*session.button)], session.profile)
+            log.info(f"Debug - Match confidence: {session.confidence:.2f}, "
+                     f"check interval: {self.check_task.current_period:.2f}s")
+
+    def start(self, workers=0, check=None):
+        """Schedule the check, debug, config and metrics tasks, with check replacing check() if given"""
+        if workers > 0:  # Capture and detection move to worker processes; this one collects and clicks
+            self.workers = workers
+            self.pool = DetectionPool(self.sessions, workers)
+            self.watch_workers()
+        profiles = [session.profile for session in self.sessions]
+        self.check_task = self.scheduler.every(
+            "check",
+            min(p.check_interval for p in profiles),
+            check or self.check,
+            max_period=min(p.max_check_interval for p in profiles),
+            backoff=min(p.check_backoff for p in profiles)
+        )
+        self.scheduler.every("debug", DEBUG_INTERVAL, self.debug, delay=DEBUG_INTERVAL)
+        self.scheduler.every("config", CONFIG_POLL_INTERVAL, self.reload_config, delay=CONFIG_POLL_INTERVAL)
+        
+        metrics_file = load_config().get("General", "metrics_file", fallback="")
+        if metrics_file:
+            interval = load_config().getfloat("General", "metrics_interval", fallback=60)
+            self.metrics_writer = BackgroundWriter("metrics", max_pending=4)
+            self.scheduler.every("metrics", interval,
+                                 lambda: self.metrics_writer.submit(metrics.dump_jsonl, metrics_file),
+                                 delay=interval)
+        
+        if self.activity is not None:
+            self.activity.start()
+        if self.supervisor is not None:
+            self.supervisor.watch("loop", self.loop_timeout, self.on_stall, owner=self)
+
+    def close(self):
+        if self.activity is not None:
+            self.activity.stop()
+        if self.supervisor is not None:
+            self.supervisor.unwatch("loop", self)
+            for index in range(self.workers):
+                self.supervisor.unwatch(f"worker {index}", self)
+        if self.pool is not None:
+            self.pool.close()
+        if self.recorder is not None:
+            self.recorder.close()
+        if self.metrics_writer is not None:
+            self.metrics_writer.close()
+        self.inputs.close()
+
+    def run(self, workers=0):
+        """Schedule the tasks and run until the scheduler is stopped"""
+        self.start(workers)
+        try:
+            self.scheduler.run()
+        finally:
+            self.close()
+
+    async def run_async(self, workers=0):
+        """Like run(), as a coroutine on the current asyncio loop; cancel it to stop"""
+        self.start(workers, self.check_async)
+        try:
+            await self.scheduler.run_async()
+        finally:
+            self.close()
+
+def build_orchestrator(sampler=None, scheduler=None, on_stall=None):
+    """Orchestrator for the configured sessions, plus its detection worker count"""
+    config = load_config()
+    sessions = load_sessions(config)
+    log.info(f"Watching {len(sessions)} window(s): {', '.join(s.name for s in sessions)}")
+    workers = config.getint("General", "detection_workers", fallback=0)
+    if workers > 0 and any(session.rules for session in sessions):
+        log.warning("Warning: [Rule ...] sections are ignored while detection_workers is set")
+    
+    recorder = None
+    record_file = config.get("General", "record_file", fallback="")
+    if record_file and workers > 0:
+        log.warning("Warning: record_file is ignored while detection_workers is set")
+    elif record_file:
+        recorder = FrameRecorder(record_file, sessions,
+                                 max_bytes=config.getint("General", "record_max_bytes", fallback=50000000),
+                                 backups=config.getint("General", "record_backups", fallback=3))
+        log.info(f"Recording frames to {record_file}")
+    
+    supervisor = get_supervisor()
+    inputs = InputQueue(supervisor=supervisor,
+                        timeout=config.getfloat("General", "watchdog_input_timeout", fallback=15))
+    activity = build_activity_model(config)
+    if activity is not None:
+        log.info(f"Jumping only within {activity.margin:g} s of the {activity.idle_kick:g} s idle kick")
+    orchestrator = Orchestrator(sessions, sampler, scheduler, inputs=inputs, recorder=recorder,
+                                supervisor=supervisor, on_stall=on_stall, activity=activity,
+                                loop_timeout=config.getfloat("General", "watchdog_loop_timeout", fallback=10))
+    return orchestrator, workers
+
+async def afk_loop_async(previous=None):
+    """The AFK loop as a task on the runtime's event loop"""
+    if previous is not None:  # The task this one replaces closes its queue, workers and recorder first
+        await asyncio.wait([previous])
+    try:
+        orchestrator, workers = build_orchestrator(scheduler=Scheduler(), on_stall=restart_afk_loop)
+        await orchestrator.run_async(workers)
+    except Exception as e:
+        log.error("AFK loop failed: %s", e)
+        if get_supervisor() is not None:
+            # Still watched, so the watchdog restarts it once the timeout passes
+            timeout = load_config().getfloat("General", "watchdog_loop_timeout", fallback=10)
+            supervisor.watch("loop", timeout, restart_afk_loop)
+        raise
+
+def restart_afk_loop():
+    """Watchdog recovery for a stalled AFK loop: replace the AFK task once the loop thread is back"""
+    stalled = afk_task
+    
+    def restart():
+        if running and afk_task is stalled:
+            respawn_afk_loop()
+            metrics.inc("loop_restarts_total")
+    
+    if runtime is not None:
+        runtime.call(restart)
+
+def respawn_afk_loop():
+    """Replace the AFK task with a fresh one built from the current config (on the loop thread)"""
+    global afk_task
+    
+    if afk_task is not None:
+        afk_task.cancel()
+    afk_task = runtime.spawn(afk_loop_async(afk_task))
+
+class UiBridge:
+    """Runs callables on the Qt thread, handed over from any other thread"""
+    def __init__(self):
+        from PyQt5 import QtCore
+        
+        self.callbacks = queue.SimpleQueue()
+        # Created on the Qt thread, so its timeout fires there; another thread starts it through a queued call
+        self.timer = QtCore.QTimer()
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(0)
+        self.timer.timeout.connect(self.run_pending)
+
+    def call(self, callback):
+        from PyQt5 import QtCore
+        
+        self.callbacks.put(callback)
+        QtCore.QMetaObject.invokeMethod(self.timer, "start", QtCore.Qt.QueuedConnection)
+
+    def run_pending(self):
+        while True:
+            try:
+                callback = self.callbacks.get_nowait()
+            except queue.Empty:
+                return
+            callback()
+
+class Runtime:
+    """One asyncio event loop for the AFK loop, hotkey actions and shutdown, shared with Qt through qasync"""
+    def __init__(self, app=None):
+        self.app = app
+        self.ui_bridge = None
+        self.thread_id = None
+        self.tasks = set()
+        if app is None:
+            self.loop = asyncio.new_event_loop()
+            return
+        try:
+            import qasync
+            self.loop = qasync.QEventLoop(app)
+        except ImportError:
+            # The loop gets its own thread and UI work goes to the Qt thread through a UiBridge
+            log.warning("Warning: qasync is not installed, running the AFK loop on its own thread")
+            self.loop = asyncio.new_event_loop()
+            self.ui_bridge = UiBridge()
+
+    def on_loop(self):
+        return threading.get_ident() == self.thread_id
+
+    def call(self, callback, *args):
+        """Run callback on the loop thread; safe from any thread, such as the hotkey hook"""
+        self.loop.call_soon_threadsafe(callback, *args)
+
+    def on_ui(self, callback):
+        """Run callback on the Qt thread"""
+        if self.ui_bridge is None:
+            callback()  # The loop already runs on the Qt thread
+        else:
+            self.ui_bridge.call(callback)
+
+    def spawn(self, coroutine):
+        """Start a task on the loop (from the loop thread); it is cancelled on stop()"""
+        task = self.loop.create_task(coroutine)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    def wake_up(self):
+        # Wake up now and then so Ctrl+C is handled promptly on Windows
+        self.loop.call_later(0.5, self.wake_up)
+
+    def serve(self):
+        self.thread_id = threading.get_ident()
+        asyncio.set_event_loop(self.loop)
+        self.wake_up()
+        self.loop.run_forever()
+
+    def run(self):
+        """Run the loop (and Qt) on the calling thread until stop()"""
+        if self.ui_bridge is None:
+            self.serve()
+        else:
+            thread = threading.Thread(target=self.serve)
+            thread.daemon = True
+            thread.start()
+            self.app.exec_()
+            thread.join(timeout=2)
+
+    def stop(self):
+        """Cancel the running tasks, then stop the loop and Qt; safe from any thread"""
+        self.call(lambda: self.loop.create_task(self.shutdown()))
+
+    async def cancel_tasks(self):
+        tasks = list(self.tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def shutdown(self):
+        await self.cancel_tasks()
+        self.loop.stop()
+        if self.app is not None:
+            self.on_ui(self.app.quit)
+
+def hide_overlay():
+    if overlay:
+        overlay.hide_overlay()
 
 def toggle_afk():
     """Toggle the AFK mode on/off"""
-    global running, overlay
+    global running, afk_task
+    
+    # running, the AFK task and the overlay are only ever touched from the loop thread
+    if not runtime.on_loop():
+        runtime.call(toggle_afk)
+        return
     
     running = not running
     
     if running:
-        print("AFK mode activated")
+        log.info("AFK mode activated")
         if app is not None:
-            overlay = create_overlay()
-            
-            # Start AFK loop in a separate thread
-            afk_thread = threading.Thread(target=afk_loop)
-            afk_thread.daemon = True
-            afk_thread.start()
+            runtime.on_ui(create_overlay)
+        afk_task = runtime.spawn(afk_loop_async(afk_task))
     else:
-        print("AFK mode deactivated")
-        if overlay:
-            overlay.hide_overlay()
+        log.info("AFK mode deactivated")
+        if supervisor is not None:
+            supervisor.unwatch("loop")
+        if afk_task is not None:
+            afk_task.cancel()  # Kept, so turning AFK back on waits for it to close
+            # Only once the task has dropped its queued input, so no late click starts a new worker
+            afk_task.add_done_callback(lambda task: None if running else stop_input_worker())
+        else:
+            stop_input_worker()
+        if app is not None:
+            runtime.on_ui(hide_overlay)
+
+class ControlServer:
+    """Local control API, one JSON object per line, shared by every instance on the machine"""
+    LINE_LIMIT = 2 ** 24
+    FORWARD_TIMEOUT = 5.0
+    RETRY_DELAY = 1.0
+
+    def __init__(self, name, address):
+        # The first instance to bind the address is the hub; the others register with it as members
+        # and answer what it forwards. Runs on the runtime's loop, so commands act on the AFK state directly.
+        self.name = name
+        self.address = address  # port number, or a Unix socket path
+        self.members = {}  # instance name -> [writer, {request id: future}]
+        self.next_id = 0
+
+    async def run(self):
+        """Serve as the hub, or as a member while another instance is the hub"""
+        while True:
+            try:
+                await self.serve()
+            except OSError:
+                try:
+                    await self.join()
+                except ConnectionRefusedError:
+                    if isinstance(self.address, str) and os.path.exists(self.address):
+                        os.remove(self.address)  # Left behind by a hub that crashed
+                        continue
+                except (OSError, ValueError) as e:
+                    log.debug(f"Control API hub connection lost: {e}")
+            await asyncio.sleep(self.RETRY_DELAY * random.uniform(0.5, 1.5))
+
+    async def serve(self):
+        if isinstance(self.address, str):
+            if os.path.exists(self.address):
+                # Binding would replace the socket of a running hub, so try joining it first
+                raise FileExistsError(f"{self.address} exists")
+            server = await asyncio.start_unix_server(self.connected, self.address, limit=self.LINE_LIMIT)
+        else:
+            server = await asyncio.start_server(self.connected, "127.0.0.1", self.address, limit=self.LINE_LIMIT)
+        log.info(f"Control API listening on {self.address} as {self.name}")
+        try:
+            await asyncio.Future()
+        finally:
+            server.close()
+            for writer, _ in list(self.members.values()):
+                writer.close()
+            if isinstance(self.address, str) and os.path.exists(self.address):
+                os.remove(self.address)
+
+    async def join(self):
+        """Register with the hub and answer its requests until it goes away"""
+        if isinstance(self.address, str):
+            reader, writer = await asyncio.open_unix_connection(self.address, limit=self.LINE_LIMIT)
+        else:
+            reader, writer = await asyncio.open_connection("127.0.0.1", self.address, limit=self.LINE_LIMIT)
+        log.info(f"Control API: joined the instance on {self.address} as {self.name}")
+        try:
+            writer.write((json.dumps({"cmd": "register", "instance": self.name}) + "\n").encode())
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                request = json.loads(line)
+                if isinstance(request, dict):
+                    reply = self.execute(request)
+                else:
+                    reply = {"ok": False, "error": "request must be a JSON object"}
+                writer.write((json.dumps(reply) + "\n").encode())
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def connected(self, reader, writer):
+        """Handle one connection: a client's requests, or a member's replies"""
+        member = None
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                except ValueError as e:
+                    reply = {"ok": False, "error": f"invalid JSON: {e}"}
+                else:
+                    if member is not None:
+                        self.resolve(member, message)
+                        continue
+                    if isinstance(message, dict) and message.get("cmd") == "register":
+                        member = self.register(message.get("instance"), writer)
+                        if member is None:
+                            break
+                        continue
+                    if isinstance(message, list):
+                        reply = list(await asyncio.gather(*(self.dispatch(request) for request in message)))
+                    else:
+                        reply = await self.dispatch(message)
+                writer.write((json.dumps(reply) + "\n").encode())
+                await writer.drain()
+        except (ConnectionError, ValueError) as e:
+            log.debug(f"Control API connection closed: {e}")
+        finally:
+            if member is not None and self.members.get(member) is not None and self.members[member][0] is writer:
+                for future in self.members.pop(member)[1].values():
+                    future.cancel()
+                log.info(f"Control API: instance {member} left")
+            writer.close()
+
+    def register(self, name, writer):
+        if not name or name == self.name or name in self.members:
+            log.warning("Warning: Control API instance name '%s' is missing or already taken", name)
+            return None
+        self.members[name] = [writer, {}]
+        log.info(f"Control API: instance {name} joined")
+        return name
+
+    def resolve(self, member, reply):
+        """Hand a member's reply to the request waiting for it"""
+        if not isinstance(reply, dict):
+            log.warning("Warning: Control API instance %s sent a reply that isn't a JSON object", member)
+            return
+        future = self.members[member][1].pop(reply.get("id"), None)
+        if future is not None and not future.done():
+            future.set_result(reply)
+
+    async def dispatch(self, request):
+        """Reply to one request, from this instance or the one(s) it names"""
+        if not isinstance(request, dict):
+            return {"ok": False, "error": "request must be a JSON object"}
+        instance = request.get("instance")
+        if instance is None or instance == self.name:
+            return self.execute(request)
+        if instance == "*":
+            names = [self.name] + list(self.members)
+            replies = await asyncio.gather(self.forward(None, request),
+                                           *(self.forward(name, request) for name in names[1:]))
+            # Members that left while the request was out aren't instances any more
+            result = {name: reply for name, reply in zip(names, replies)
+                      if name == self.name or name in self.members}
+            return {"id": request.get("id"), "ok": True, "result": result}
+        if instance not in self.members:
+            return {"id": request.get("id"), "ok": False, "error": f"unknown instance {instance}"}
+        return await self.forward(instance, request)
+
+    async def forward(self, member, request):
+        """Run request on a member instance (None: this one) and relabel its reply"""
+        if member is None:
+            return self.execute(request)
+        if member not in self.members:
+            return {"id": request.get("id"), "ok": False, "error": f"instance {member} left"}
+        writer, waiting = self.members[member]
+        self.next_id += 1
+        forward_id = self.next_id
+        future = asyncio.get_running_loop().create_future()
+        waiting[forward_id] = future
+        message = dict(request, id=forward_id)
+        message.pop("instance", None)
+        writer.write((json.dumps(message) + "\n").encode())
+        try:
+            reply = await asyncio.wait_for(future, self.FORWARD_TIMEOUT)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            waiting.pop(forward_id, None)
+            return {"id": request.get("id"), "ok": False, "error": f"instance {member} did not answer"}
+        return dict(reply, id=request.get("id"))
+
+    def execute(self, request):
+        """Run one command on this instance"""
+        handler = getattr(self, "command_" + str(request.get("cmd")), None)
+        if handler is None:
+            return {"id": request.get("id"), "ok": False, "error": f"unknown command {request.get('cmd')}"}
+        try:
+            result = handler(request)
+        except Exception as e:
+            metrics.inc("control_errors_total", cmd=request.get("cmd"))
+            return {"id": request.get("id"), "ok": False, "error": str(e)}
+        metrics.inc("control_requests_total", cmd=request.get("cmd"))
+        return {"id": request.get("id"), "ok": True, "result": result}
+
+    def command_ping(self, request):
+        return self.name
+
+    def command_status(self, request):
+        sessions = session_stats(metrics.snapshot())
+        return {
+            "instance": self.name,
+            "pid": os.getpid(),
+            "running": running,
+            "profile": ACTIVE_PROFILE.name if ACTIVE_PROFILE else None,
+            "sessions": {name: {"confidence": confidence, "clicks": clicks, "jumps": jumps}
+                         for name, (confidence, clicks, jumps) in sessions.items()},
+        }
+
+    def command_stats(self, request):
+        return metrics.snapshot()
+
+    def command_instances(self, request):
+        return [self.name] + list(self.members)
+
+    def command_toggle(self, request):
+        """Toggle AFK mode, or set it with "on": true/false"""
+        if request.get("on") is None or bool(request["on"]) != running:
+            toggle_afk()
+        return {"running": running}
+
+    def command_switch_profile(self, request):
+        profile = request.get("profile")
+        if not profile or not switch_profile(profile):
+            raise ValueError(f"no profile named {profile}")
+        if running:
+            respawn_afk_loop()  # Own config writes don't trigger a reload
+        return {"profile": profile}
+
+    def command_quit(self, request):
+        # Shortly after, so the reply and any forwarded quits still go out
+        asyncio.get_running_loop().call_later(0.5, runtime.stop)
+        return {"quitting": True}
+
+def start_control_server(config):
+    """Start the control API on the runtime loop if control_port or control_socket is set"""
+    address = config.getint("General", "control_port", fallback=0)
+    path = config.get("General", "control_socket", fallback="")
+    if path and hasattr(socket, "AF_UNIX"):
+        address = path
+    elif path:
+        log.warning("Warning: control_socket needs Unix sockets, use control_port on this system")
+    if not address:
+        return None
+    name = config.get("General", "instance_name", fallback="") or f"{socket.gethostname()}-{os.getpid()}"
+    server = ControlServer(name, address)
+    runtime.call(lambda: runtime.spawn(server.run()))
+    return server
 
 def show_simple_config_dialog():
     """Show a simple configuration dialog with just two options"""
+    from PyQt5 import QtWidgets
+    
     msg_box = QtWidgets.QMessageBox()
     msg_box.setWindowTitle("Select Roblox Window Mode")
     msg_box.setText("Which Roblox window mode are you using?")
@@ -492,6 +3739,7 @@ def show_simple_config_dialog():
     # Add buttons for the two main profiles
     fullscreen_btn = msg_box.addButton("3440x1440", QtWidgets.QMessageBox.ActionRole)
     windowed_btn = msg_box.addButton("1080p Windowed", QtWidgets.QMessageBox.ActionRole)
+    calibrate_btn = msg_box.addButton("Calibrate from screenshot...", QtWidgets.QMessageBox.ActionRole)
     cancel_btn = msg_box.addButton(QtWidgets.QMessageBox.Cancel)
     
     # Show the dialog
@@ -504,12 +3752,32 @@ def show_simple_config_dialog():
     elif msg_box.clickedButton() == windowed_btn:
         switch_profile("1080p_Windowed")
         return True
+    elif msg_box.clickedButton() == calibrate_btn:
+        path, _ = QtWidgets.QFileDialog.getOpenFileName(
+            None, "Screenshot showing the disconnect dialog", "", "Images (*.png *.jpg *.bmp)")
+        profile_name = calibrate_from_source(path) if path else None
+        if profile_name is None:
+            return show_simple_config_dialog()
+        return switch_profile(profile_name)
     else:
         return False
 
-def main():
+def parse_args(argv=None):
+    """Command line options for the rbxafk entry point"""
+    parser = argparse.ArgumentParser(description="Roblox AFK script")
+    parser.add_argument("--headless", action="store_true",
+                        help="run without Qt: no window mode dialog and no overlay")
+    parser.add_argument("--profile", help="resolution profile to use instead of asking")
+    parser.add_argument("--start", action="store_true", help="turn AFK mode on right away")
+    parser.add_argument("--calibrate", metavar="SCREENSHOT",
+                        help="build a profile by finding the dialog in a screenshot ('screen' for the live screen)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """Main function to run the AFK script"""
-    global app, overlay
+    global app, runtime
+    
+    args = parse_args(argv)
     
     print(r"""   
    _____  _______________  __.    ____________________________.________________________
@@ -523,55 +3791,95 @@ def main():
     # Print version separately to allow for variable substitution
     print(f"V{SCRIPT_VERSION} - Doge's AFK Script")
     
+    # Console logging first so config messages show up, then add the log file if configured
+    setup_logging()
+    
     # Load configuration
     config = load_config()
+    log_file = config.get("General", "log_file", fallback="")
+    if log_file:
+        setup_logging(log_file,
+                      config.getint("General", "log_max_bytes", fallback=1000000),
+                      config.getint("General", "log_backup_count", fallback=3))
     
-    # Initialize the Qt application
-    app = QtWidgets.QApplication(sys.argv)
+    if not args.headless:
+        # Initialize the Qt application
+        from PyQt5 import QtWidgets
+        app = QtWidgets.QApplication(sys.argv)
+        app.setQuitOnLastWindowClosed(False)  # Hiding the overlay must not end the script
     
-    # Show simple configuration dialog
-    if not show_simple_config_dialog():
-        print("Configuration cancelled. Exiting.")
-        return
+    if args.calibrate:
+        profile_name = calibrate_from_source(args.calibrate)
+        if profile_name is None or not switch_profile(profile_name):
+            sys.exit(1)
+    elif args.profile:
+        if not switch_profile(args.profile):
+            sys.exit(1)
+    elif not args.headless:
+        # Show simple configuration dialog
+        if not show_simple_config_dialog():
+            log.info("Configuration cancelled. Exiting.")
+            return
     
     # Load pixel coordinates from active profile
     load_pixel_coordinates()
     
     # Check for AHK setup
-    if not check_ahk_installation():
-        error_box = QtWidgets.QMessageBox()
-        error_box.setWindowTitle("AutoHotkey Required")
-        error_box.setText("This script requires AutoHotkey to function.")
-        error_box.setInformativeText("Please install AutoHotkey from https://www.autohotkey.com/download/ahk-install.exe and restart this script.")
-        error_box.setStandardButtons(QtWidgets.QMessageBox.Ok)
-        error_box.exec_()
-        
-        # Open the AHK download page
-        webbrowser.open("https://www.autohotkey.com/download/ahk-install.exe")
-        
-        print("Script terminated: AutoHotkey is required but not found.")
+    if not check_ahk_installation(interactive=not args.headless):
+        if not args.headless:
+            error_box = QtWidgets.QMessageBox()
+            error_box.setWindowTitle("AutoHotkey Required")
+            error_box.setText("This script requires AutoHotkey to function.")
+            error_box.setInformativeText("Please install AutoHotkey from https://www.autohotkey.com/download/ahk-install.exe and restart this script.")
+            error_box.setStandardButtons(QtWidgets.QMessageBox.Ok)
+            error_box.exec_()
+            
+            # Open the AHK download page
+            import webbrowser
+            webbrowser.open("https://www.autohotkey.com/download/ahk-install.exe")
+        
+        log.error("Script terminated: AutoHotkey is required but not found.")
         sys.exit(1)
     
-    print(f"Press {TOGGLE_KEY.upper()} to toggle AFK mode")
+    # Pick the fastest screen capture for the probe region before AFK mode needs it
+    get_capture()
     
-    # Register the toggle hotkey
-    keyboard.add_hotkey(TOGGLE_KEY, toggle_afk)
+    # Optional local metrics endpoint
+    metrics_port = config.getint("General", "metrics_port", fallback=0)
+    if metrics_port:
+        start_metrics_server(metrics_port)
+    
+    runtime = Runtime(app)
+    
+    start_control_server(config)
+    
+    if config.getboolean("General", "hotkeys", fallback=True):
+        log.info(f"Press {TOGGLE_KEY.upper()} to toggle AFK mode")
+        
+        # Hotkey callbacks run on the keyboard hook thread, so hand them to the runtime
+        import keyboard
+        keyboard.add_hotkey(TOGGLE_KEY, lambda: runtime.call(toggle_afk))
+        
+        # Add a way to completely exit the script
+        keyboard.add_hotkey('esc+f12', runtime.stop)
     
-    # Add a way to completely exit the script
-    keyboard.add_hotkey('esc+f12', lambda: sys.exit())
+    log.info(f"Ready in {(time.perf_counter() - STARTUP_STARTED) * 1000:.0f} ms"
+             f"{' (headless)' if args.headless else ''}")
     
-    # Create a dummy widget to keep the application running
-    dummy = QtWidgets.QWidget()
+    if args.start:
+        runtime.call(toggle_afk)
     
-    # Keep the script running using Qt event loop
     try:
-        sys.exit(app.exec_())
+        runtime.run()
     except KeyboardInterrupt:
-        print("Script terminated by user")
+        log.info("Script terminated by user")
     finally:
-        # Clean up
-        if overlay:
-            overlay.hide_overlay()
+        # Clean up, letting the AFK task close its workers and recorder
+        if runtime.tasks and not runtime.loop.is_running():
+            runtime.loop.run_until_complete(runtime.cancel_tasks())
+        stop_input_worker()
+        hide_overlay()
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # Detection workers in a frozen build
     main()
@@ -0,0 +1,316 @@
+"""Headless benchmark for the AFK detection loop
+
+Replays synthetic (or recorded) frame sequences through the orchestrator
+with a fake capture source and a fake input sink, so the detection loop can
+be measured without Windows, Roblox or AutoHotkey.
+
+Usage:
+    python bench.py
+    python bench.py --scenario button --ticks 5000
+    python bench.py --frames recorded_frames/ --json
+    python bench.py --recording afk.rbxrec
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+from PIL import Image
+
+import afk
+
+SCREEN_SIZE = (1920, 1080)  # width, height of the synthetic screen
+FRAME_RATE = 60  # frames per second of the simulated screen
+DIALOG_COLOR = (58, 59, 61)
+BUTTON_COLOR = (255, 255, 255)
+
+# Profile used for every scenario (the default 1080p windowed coordinates)
+BENCH_PROFILE = {
+    "pixel_check_x": "957",
+    "pixel_check_y": "477",
+    "button_pixel_x": "1054",
+    "button_pixel_y": "606",
+    "jump_interval": "5",
+}
+
+class Scenario:
+    """A synthetic screen that changes over time
+
+    render(i) updates the screen array in place for frame i and returns it,
+    so long runs don't allocate a new full-screen frame per tick.
+    """
+    def __init__(self, name, dialog_frame=None, button=False, busy=False, frames=600):
+        self.name = name
+        self.dialog_frame = dialog_frame
+        self.button = button
+        self.busy = busy
+        self.frames = frames
+        rng = np.random.default_rng(1)
+        self.base = rng.integers(0, 40, size=(SCREEN_SIZE[1], SCREEN_SIZE[0], 3), dtype=np.uint8)
+        self.screen = self.base.copy()
+        self.profile = afk.Profile("bench", BENCH_PROFILE)
+
+    def dialog_visible(self, i):
+        return self.dialog_frame is not None and i >= self.dialog_frame
+
+    def render(self, i):
+        p = self.profile
+        cx, cy = p.pixel_to_check
+        bx, by = p.button_pixel
+        if self.busy:
+            # Animate the game world around the probes so every frame differs
+            self.screen[cy - 2:cy + 3, cx - 2:cx + 3] = i % 40
+            self.screen[by - 2:by + 3, bx - 2:bx + 3] = (i * 7) % 40
+        else:
+            self.screen[cy, cx] = self.base[cy, cx]
+            self.screen[by, bx] = self.base[by, bx]
+        if self.dialog_visible(i):
+            self.screen[cy, cx] = DIALOG_COLOR
+            if self.button:
+                self.screen[by, bx] = BUTTON_COLOR
+        return self.screen
+
+class RecordedScenario:
+    """Replays a directory of screenshots (sorted by name) as a frame sequence"""
+    def __init__(self, directory, profile):
+        self.name = os.path.basename(os.path.normpath(directory))
+        self.paths = sorted(glob.glob(os.path.join(directory, "*.png")))
+        if not self.paths:
+            raise ValueError(f"No .png frames found in {directory}")
+        self.frames = len(self.paths)
+        self.profile = profile
+        self.dialog_frame = None
+        self.cache = {}
+
+    def dialog_visible(self, i):
+        return False
+
+    def render(self, i):
+        i = i % self.frames
+        if i not in self.cache:
+            self.cache[i] = np.asarray(Image.open(self.paths[i]).convert("RGB"))
+        return self.cache[i]
+
+class RecordingScenario:
+    """Replays a FrameRecorder file, pasting each recorded region onto a blank screen"""
+    def __init__(self, path):
+        self.name = os.path.splitext(os.path.basename(path))[0]
+        self.recording = afk.Recording(path)
+        self.profile = self.recording.sessions()[0].profile
+        self.dialog_frame = None
+        extents = [(r.frame.left + r.frame.pixels.shape[1], r.frame.top + r.frame.pixels.shape[0])
+                   for r in self.recording]
+        if not extents:
+            raise ValueError(f"No frames recorded in {path}")
+        self.frames = len(extents)
+        self.screen = np.zeros((max(y for _, y in extents), max(x for x, _ in extents), 3), dtype=np.uint8)
+        self.records = iter(())
+        self.position = None
+
+    def dialog_visible(self, i):
+        return False
+
+    def render(self, i):
+        if i != self.position:
+            if self.position is None or i < self.position:
+                self.records = iter(self.recording)
+                self.position = -1
+            while self.position < i:
+                frame = next(self.records).frame
+                self.position += 1
+            height, width = frame.pixels.shape[:2]
+            self.screen[frame.top:frame.top + height, frame.left:frame.left + width] = frame.pixels
+        return self.screen
+
+SCENARIOS = {
+    "idle": lambda: Scenario("idle"),
+    "busy": lambda: Scenario("busy", busy=True),
+    "dialog": lambda: Scenario("dialog", dialog_frame=120),
+    "button": lambda: Scenario("button", dialog_frame=120, button=True),
+}
+
+class ReplayCapture:
+    """Fake capture backend serving crops of the current scenario frame
+    
+    By default each capture is a new PIL image, allocated like the real
+    PIL and mss grabs. With zero_copy it is an array view into the
+    scenario screen instead, which shows what the loop itself allocates.
+    """
+    def __init__(self, scenario, zero_copy=False):
+        self.scenario = scenario
+        self.zero_copy = zero_copy
+        self.frame = 0
+        self.screen = scenario.render(0)
+        self.captures = 0
+
+    def show(self, i):
+        self.frame = i
+        self.screen = self.scenario.render(i)
+
+    def __call__(self, bbox):
+        self.captures += 1
+        left, top, right, bottom = bbox
+        if self.zero_copy:
+            return self.screen[top:bottom, left:right]
+        return Image.fromarray(self.screen[top:bottom, left:right])
+
+class RecordingSink:
+    """Fake input sink that records jumps and clicks instead of sending them"""
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.jumps = 0
+        self.clicks = []
+
+    def focus(self, session):
+        pass
+
+    def jump(self, session):
+        self.jumps += 1
+
+    def click(self, session):
+        self.clicks.append(self.clock())
+
+    def click_at(self, session, point):
+        self.clicks.append(self.clock())
+
+    def send(self, session, keys):
+        pass
+
+class InlineInputs:
+    """Runs queued input actions immediately, so timings stay on one thread"""
+    def put(self, name, action, key=None):
+        action()
+        return True
+
+    def close(self):
+        pass
+
+def build(scenario, clock=time.perf_counter, scheduler=None, zero_copy=False):
+    """Wire a single-session orchestrator to the replay capture and recording sink"""
+    capture = ReplayCapture(scenario, zero_copy)
+    sink = RecordingSink(clock)
+    orchestrator = afk.Orchestrator(
+        [afk.Session(scenario.profile.name, scenario.profile)],
+        sampler=afk.PixelSampler(capture, ring=afk.FrameRing()),
+        scheduler=scheduler,
+        inputs=InlineInputs(),
+        sink=sink
+    )
+    return orchestrator, capture, sink
+
+def measure_allocations(scenario, ticks, zero_copy=False):
+    """Average KiB allocated per check(), traced separately because tracing slows everything down"""
+    orchestrator, capture, sink = build(scenario, zero_copy=zero_copy)
+    peak_total = 0
+    tracemalloc.start()
+    for i in range(ticks):
+        capture.show(i % scenario.frames)
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        orchestrator.check()
+        peak_total += tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+    return peak_total / ticks / 1024
+
+def measure_throughput(scenario, ticks):
+    """Run check() back to back: ticks/sec, CPU per tick and allocations per tick
+    
+    Allocations are reported with a capture that allocates like the real
+    backends (comparable across versions) and with a zero-copy capture.
+    """
+    orchestrator, capture, sink = build(scenario)
+
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    for i in range(ticks):
+        capture.show(i % scenario.frames)
+        orchestrator.check()
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    alloc_ticks = min(ticks, 500)
+    return {
+        "ticks_per_sec": ticks / wall,
+        "cpu_us_per_tick": cpu / ticks * 1e6,
+        "alloc_kib_per_tick": measure_allocations(scenario, alloc_ticks),
+        "alloc_kib_per_tick_zero_copy": measure_allocations(scenario, alloc_ticks, zero_copy=True),
+    }
+
+def measure_latency(scenario, seconds):
+    """Run the real scheduler on a fake clock over the scenario timeline
+
+    Frame i is on screen from i / FRAME_RATE seconds, so the result includes
+    the check period back-off, not just processing time.
+    """
+    now = [0.0]
+    scheduler = afk.Scheduler(clock=lambda: now[0], wait=None)
+
+    def wait(timeout):
+        now[0] += timeout if timeout is not None else 1.0
+        if now[0] >= seconds:
+            scheduler.stop()
+    scheduler.wait = wait
+
+    orchestrator, capture, sink = build(scenario, clock=lambda: now[0], scheduler=scheduler)
+
+    def show_current_frame(bbox, capture_frame=capture.__call__):
+        capture.show(min(int(now[0] * FRAME_RATE), scenario.frames - 1))
+        return capture_frame(bbox)
+    orchestrator.sampler.capture = show_current_frame
+    orchestrator.run()
+
+    result = {"captures": capture.captures, "captures_per_sec": capture.captures / seconds, "jumps": sink.jumps}
+    if scenario.dialog_frame is not None:
+        appeared = scenario.dialog_frame / FRAME_RATE
+        result["dialog_at_s"] = appeared
+        result["clicks"] = len(sink.clicks)
+        result["detect_latency_ms"] = (sink.clicks[0] - appeared) * 1000 if sink.clicks else None
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the AFK detection loop headless")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), action="append",
+                        help="scenario to run (repeatable, default: all)")
+    parser.add_argument("--frames", help="directory of recorded .png frames to replay instead")
+    parser.add_argument("--recording", help="recording file (record_file in config.ini) to replay instead")
+    parser.add_argument("--ticks", type=int, default=2000, help="ticks for the throughput run")
+    parser.add_argument("--seconds", type=float, default=30, help="simulated seconds for the latency run")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    # Keep the periodic debug dump out of the report
+    afk.DEBUG_INTERVAL = 3600
+
+    if args.recording:
+        scenarios = [RecordingScenario(args.recording)]
+    elif args.frames:
+        scenarios = [RecordedScenario(args.frames, afk.Profile("bench", BENCH_PROFILE))]
+    else:
+        scenarios = [SCENARIOS[name]() for name in (args.scenario or sorted(SCENARIOS))]
+
+    results = {}
+    for scenario in scenarios:
+        result = measure_throughput(scenario, args.ticks)
+        result.update(measure_latency(scenario, args.seconds))
+        results[scenario.name] = result
+
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+        return
+
+    print(f"{'scenario':<10} {'ticks/s':>10} {'cpu us/tick':>12} {'KiB/tick':>9} {'zero-copy':>10} "
+          f"{'captures/s':>11} {'latency ms':>11}")
+    for name, r in results.items():
+        latency = r.get("detect_latency_ms")
+        latency = "-" if latency is None else f"{latency:.0f}"
+        print(f"{name:<10} {r['ticks_per_sec']:>10.0f} {r['cpu_us_per_tick']:>12.1f} "
+              f"{r['alloc_kib_per_tick']:>9.1f} {r['alloc_kib_per_tick_zero_copy']:>10.1f} "
+              f"{r['captures_per_sec']:>11.1f} {latency:>11}")
+
+if __name__ == "__main__":
+    main()
@@ -8,13 +8,15 @@ setup(
     packages=find_packages(),
     install_requires=[
         'Pillow',  # For ImageGrab
+        'numpy',   # For probe matching
         'PyQt5',   # For the GUI components
         'keyboard',  # For keyboard input
         'ahk',     # For AutoHotkey integration
         'pyrobloxbot',  # For Roblox bot functionality
         'configparser',  # For config file management
+        'qasync',  # Run asyncio and Qt on one event loop
     ],
-    python_requires='>=3.6',
+    python_requires='>=3.7',
     entry_points={
         'console_scripts': [
             'rbxafk=afk:main',
@@ -0,0 +1,75 @@
+import configparser
+
+import afk
+
+PROFILE = {
+    "pixel_check_x": "12",
+    "pixel_check_y": "10",
+    "button_pixel_x": "30",
+    "button_pixel_y": "20",
+}
+
+class FakeWindows:
+    def __init__(self):
+        self.focused = None
+
+    def handle(self, title):
+        return title
+
+    def foreground(self):
+        return self.focused
+
+def model():
+    now = [0.0]
+    windows = FakeWindows()
+    activity = afk.ActivityModel(windows, idle_kick=1200, margin=120, clock=lambda: now[0])
+    return activity, windows, now
+
+def session(title):
+    return afk.Session(title, afk.Profile("test", PROFILE), window_title=title)
+
+def test_unknown_session_is_due_at_once():
+    activity, windows, now = model()
+    assert activity.due(session("a"))
+
+def test_sent_action_postpones_the_next_jump():
+    activity, windows, now = model()
+    a = session("a")
+    with activity.sending(a):
+        pass
+    now[0] = 1079
+    assert not activity.due(a)
+    now[0] = 1080
+    assert activity.due(a)
+
+def test_real_key_press_counts_for_the_focused_window_only():
+    activity, windows, now = model()
+    a, b = session("a"), session("b")
+    windows.focused = "a"
+    now[0] = 500
+    activity.key_pressed()
+    now[0] = 1000
+    assert not activity.due(a)
+    assert activity.due(b)
+
+def test_key_events_from_the_scripts_own_input_are_ignored():
+    activity, windows, now = model()
+    a, b = session("a"), session("b")
+    windows.focused = "b"
+    with activity.sending(a):
+        activity.key_pressed()  # The jump's own key press, with b focused
+    now[0] = afk.ActivityModel.SYNTHETIC_GRACE / 2
+    activity.key_pressed()
+    assert activity.due(b)
+    now[0] = afk.ActivityModel.SYNTHETIC_GRACE
+    activity.key_pressed()
+    assert not activity.due(b)
+
+def test_model_is_off_without_idle_kick_seconds():
+    config = configparser.ConfigParser()
+    config["General"] = {}
+    assert afk.build_activity_model(config, FakeWindows()) is None
+    config["General"]["idle_kick_seconds"] = "600"
+    config["General"]["idle_margin"] = "60"
+    activity = afk.build_activity_model(config, FakeWindows())
+    assert (activity.idle_kick, activity.margin) == (600, 60)
@@ -0,0 +1,68 @@
+import numpy as np
+from PIL import Image
+
+import afk
+
+def dialog_image(width=48, height=32):
+    """A template with enough structure to have one clear best match"""
+    y, x = np.mgrid[0:height, 0:width]
+    pixels = np.zeros((height, width, 3), dtype=np.uint8)
+    pixels[..., 0] = (x * 5) % 256
+    pixels[..., 1] = (y * 7) % 256
+    pixels[4:10, 6:40] = 255
+    return pixels
+
+def screen_with(template, left, top, size=(240, 160)):
+    rng = np.random.default_rng(3)
+    screen = rng.integers(0, 30, size=(size[1], size[0], 3), dtype=np.uint8)
+    height, width = template.shape[:2]
+    screen[top:top + height, left:left + width] = template
+    return screen
+
+def test_find_template_exact_position():
+    template = dialog_image()
+    screen = screen_with(template, 101, 57)
+    x, y, scale, rms = afk.find_template(screen, Image.fromarray(template), [1.0])
+    assert (x, y, scale) == (101, 57, 1.0)
+    assert type(x) is int and type(y) is int
+    assert rms < 1.0
+
+def test_find_template_picks_the_right_scale():
+    template = dialog_image()
+    scaled = np.asarray(Image.fromarray(template).resize((72, 48), Image.BILINEAR))
+    screen = screen_with(scaled, 60, 40)
+    x, y, scale, _ = afk.find_template(screen, Image.fromarray(template), [1.0, 1.5, 2.0])
+    assert scale == 1.5
+    assert abs(x - 60) <= 1 and abs(y - 40) <= 1
+
+def test_find_template_too_small_returns_none():
+    screen = np.zeros((50, 50, 3), dtype=np.uint8)
+    template = Image.fromarray(np.zeros((4, 4, 3), dtype=np.uint8))
+    assert afk.find_template(screen, template, [1.0]) is None
+
+def calibration_config(tmp_path, monkeypatch, **settings):
+    template = dialog_image()
+    Image.fromarray(template).save(tmp_path / "dialog.png")
+    monkeypatch.setattr(afk, "CONFIG_FILE", str(tmp_path / "config.ini"))
+    monkeypatch.setattr(afk, "save_config", lambda config: None)
+    config = afk.create_default_config()
+    config["Calibration"] = dict({"template": "dialog.png", "scales": "1.0"}, **settings)
+    return config, screen_with(template, 101, 57)
+
+def test_calibrate_profile_writes_plain_ints(tmp_path, monkeypatch):
+    config, screen = calibration_config(tmp_path, monkeypatch, check_offset="10,6", button_offset="20,20")
+    assert afk.calibrate_profile(screen, config) == "auto_240x160"
+    section = config["auto_240x160"]
+    assert (section["pixel_check_x"], section["pixel_check_y"]) == ("111", "63")
+    assert (section["button_pixel_x"], section["button_pixel_y"]) == ("121", "77")
+
+def test_calibrate_profile_without_offsets(tmp_path, monkeypatch):
+    config, screen = calibration_config(tmp_path, monkeypatch, check_offset="10,6")
+    assert afk.calibrate_profile(screen, config) is None
+
+def test_calibration_cache_follows_offsets(tmp_path, monkeypatch):
+    config, screen = calibration_config(tmp_path, monkeypatch, check_offset="10,6", button_offset="20,20")
+    afk.calibrate_profile(screen, config)
+    config["Calibration"]["check_offset"] = "12,6"
+    afk.calibrate_profile(screen, config)
+    assert config["auto_240x160"]["pixel_check_x"] == "113"
@@ -0,0 +1,63 @@
+import threading
+
+import numpy as np
+import pytest
+
+import afk
+
+class FakeBackend:
+    def __init__(self, name, delay=0.0, broken=False):
+        self.name = name
+        self.delay = delay
+        self.broken = broken
+        self.calls = 0
+
+    def __call__(self, bbox):
+        self.calls += 1
+        if self.broken:
+            raise OSError(f"{self.name} failed")
+        if self.delay:
+            threading.Event().wait(self.delay)
+        return np.zeros((bbox[3] - bbox[1], bbox[2] - bbox[0], 3), dtype=np.uint8)
+
+def unavailable():
+    raise ImportError("not installed")
+
+BBOX = (0, 0, 4, 4)
+
+def test_fastest_backend_goes_first():
+    backends = {"slow": lambda: FakeBackend("slow", delay=0.01), "fast": lambda: FakeBackend("fast"),
+                "missing": unavailable}
+    capture = afk.select_capture(BBOX, backends=backends, rounds=3)
+    assert [backend.name for backend in capture.backends] == ["fast", "slow"]
+
+def test_preferred_backend_goes_first():
+    backends = {"slow": lambda: FakeBackend("slow", delay=0.01), "fast": lambda: FakeBackend("fast")}
+    capture = afk.select_capture(BBOX, "slow", backends=backends, rounds=3)
+    assert capture.name == "slow"
+
+def test_failing_backend_is_moved_back():
+    broken, working = FakeBackend("broken", broken=True), FakeBackend("working")
+    capture = afk.FallbackCapture([broken, working])
+    for _ in range(afk.FallbackCapture.MAX_FAILURES):
+        assert capture(BBOX).shape == (4, 4, 3)
+    assert capture.name == "working"
+    capture(BBOX)
+    assert broken.calls == afk.FallbackCapture.MAX_FAILURES
+
+def test_every_backend_failing_raises():
+    capture = afk.FallbackCapture([FakeBackend("a", broken=True), FakeBackend("b", broken=True)])
+    with pytest.raises(OSError, match="a failed"):
+        capture(BBOX)
+
+def test_stuck_grab_times_out():
+    capture = afk.TimedCapture(FakeBackend("stuck", delay=1.0), timeout=0.05)
+    with pytest.raises(TimeoutError):
+        capture(BBOX)
+    capture.backend.delay = 0
+    assert capture(BBOX).shape == (4, 4, 3)
+
+def test_timed_backend_falls_through():
+    capture = afk.FallbackCapture([afk.TimedCapture(FakeBackend("stuck", delay=1.0), timeout=0.05),
+                                   FakeBackend("working")])
+    assert capture(BBOX).shape == (4, 4, 3)
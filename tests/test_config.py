@@ -0,0 +1,72 @@
+import configparser
+import os
+
+import afk
+
+def edit_file(path, section, key, value):
+    """Change config.ini behind the store's back, with a newer mtime"""
+    config = configparser.ConfigParser()
+    config.read(path)
+    if not config.has_section(section):
+        config.add_section(section)
+    config[section][key] = value
+    with open(path, "w") as f:
+        config.write(f)
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime, stat.st_mtime + 5))
+
+def read_file(path):
+    config = configparser.ConfigParser()
+    config.read(path)
+    return config
+
+def test_missing_file_is_created_with_defaults(tmp_path):
+    path = str(tmp_path / "config.ini")
+    store = afk.ConfigStore(path)
+    assert store.get().has_section("1080p_Windowed")
+    assert read_file(path).has_section("3440x1440")
+
+def test_poll_reloads_outside_edits_and_rebuilds_changed_profiles(tmp_path):
+    path = str(tmp_path / "config.ini")
+    store = afk.ConfigStore(path)
+    store.get()
+    before = store.profile("1080p_Windowed")
+    unchanged = store.profile("3440x1440")
+    assert not store.poll()
+    edit_file(path, "1080p_Windowed", "jump_interval", "9")
+    assert store.poll()
+    assert store.profile("1080p_Windowed") is not before
+    assert store.profile("1080p_Windowed").jump_interval == 9
+    assert store.profile("3440x1440") is unchanged
+
+def test_saves_are_batched(tmp_path):
+    path = str(tmp_path / "config.ini")
+    store = afk.ConfigStore(path, write_delay=60)
+    config = store.get()
+    config["General"]["active_profile"] = "1080p_Windowed"
+    store.save()
+    config["General"]["overlay"] = "off"
+    store.save()
+    assert read_file(path)["General"]["active_profile"] == "3440x1440"
+    store.close()
+    assert dict(read_file(path)["General"]) == {"active_profile": "1080p_Windowed", "overlay": "off"}
+
+def test_pending_save_keeps_outside_edits(tmp_path):
+    path = str(tmp_path / "config.ini")
+    store = afk.ConfigStore(path, write_delay=60)
+    config = store.get()
+    config["General"]["active_profile"] = "1080p_Windowed"
+    del config["3440x1440"]["toggle_key"]
+    store.save()
+    edit_file(path, "General", "overlay", "badge")
+    edit_file(path, "Session alt", "profile", "1080p_Windowed")
+    assert not store.poll()  # Left for the flush to merge
+    store.flush()
+    on_disk = read_file(path)
+    assert on_disk["General"]["active_profile"] == "1080p_Windowed"
+    assert on_disk["General"]["overlay"] == "badge"
+    assert on_disk["Session alt"]["profile"] == "1080p_Windowed"
+    assert not on_disk.has_option("3440x1440", "toggle_key")
+    assert store.poll()  # Reports the merged edit once
+    assert not store.poll()
+    assert store.get()["General"]["overlay"] == "badge"
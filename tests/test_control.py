@@ -0,0 +1,61 @@
+import asyncio
+import json
+
+import afk
+
+class MemberWriter:
+    """A member's connection: answers each forwarded request through the hub, or leaves instead"""
+    def __init__(self, server, name, reply=True):
+        self.server = server
+        self.name = name
+        self.reply = reply
+
+    def write(self, data):
+        message = json.loads(data)
+        loop = asyncio.get_running_loop()
+        if self.reply:
+            loop.call_soon(self.server.resolve, self.name, {"id": message["id"], "ok": True, "result": self.name})
+        else:
+            loop.call_soon(self.leave)
+
+    def leave(self):
+        for future in self.server.members.pop(self.name)[1].values():
+            future.cancel()
+
+def test_execute():
+    server = afk.ControlServer("hub", 0)
+    assert server.execute({"cmd": "ping", "id": 1}) == {"id": 1, "ok": True, "result": "hub"}
+    assert server.execute({"cmd": "nope", "id": 2})["ok"] is False
+
+def test_dispatch_rejects_bad_requests():
+    server = afk.ControlServer("hub", 0)
+    assert asyncio.run(server.dispatch(["ping"]))["ok"] is False
+    assert asyncio.run(server.dispatch({"cmd": "ping", "instance": "other"}))["error"] == "unknown instance other"
+
+def test_forward_to_member():
+    server = afk.ControlServer("hub", 0)
+    server.register("a", MemberWriter(server, "a"))
+    reply = asyncio.run(server.dispatch({"cmd": "ping", "id": 7, "instance": "a"}))
+    assert reply == {"id": 7, "ok": True, "result": "a"}
+
+def test_broadcast_skips_members_that_leave():
+    server = afk.ControlServer("hub", 0)
+    server.register("a", MemberWriter(server, "a"))
+    server.register("b", MemberWriter(server, "b", reply=False))
+    reply = asyncio.run(server.dispatch({"cmd": "ping", "id": 3, "instance": "*"}))
+    assert reply["ok"] and set(reply["result"]) == {"hub", "a"}
+    assert reply["result"]["a"]["result"] == "a"
+
+def test_forward_to_departed_member():
+    server = afk.ControlServer("hub", 0)
+    reply = asyncio.run(server.forward("gone", {"cmd": "ping", "id": 4}))
+    assert reply == {"id": 4, "ok": False, "error": "instance gone left"}
+
+def test_non_object_reply_is_ignored():
+    server = afk.ControlServer("hub", 0)
+    server.FORWARD_TIMEOUT = 0.1
+    writer = MemberWriter(server, "a")
+    writer.write = lambda data: asyncio.get_running_loop().call_soon(server.resolve, "a", ["not", "a", "reply"])
+    server.register("a", writer)
+    reply = asyncio.run(server.dispatch({"cmd": "ping", "id": 5, "instance": "a"}))
+    assert reply == {"id": 5, "ok": False, "error": "instance a did not answer"}
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+import afk
+
+def image(value, width=8, height=6):
+    return np.full((height, width, 3), value, dtype=np.uint8)
+
+def test_write_and_get():
+    ring = afk.FrameRing(slots=2, width=8, height=6)
+    try:
+        frame = ring.write(image(7), 100, 50)
+        assert frame.seq == 1 and frame.color(100, 50) == (7, 7, 7)
+        assert ring.latest().seq == 1
+        assert ring.get(1).covers(107, 55) and not ring.get(1).covers(108, 55)
+        assert ring.get(0) is None and ring.get(2) is None
+    finally:
+        ring.release()
+
+def test_overwritten_frames_are_gone():
+    ring = afk.FrameRing(slots=2, width=8, height=6)
+    try:
+        for value in (1, 2, 3):
+            ring.write(image(value), 0, 0)
+        assert ring.get(1) is None
+        assert ring.get(2).color(0, 0) == (2, 2, 2)
+        assert ring.latest().color(0, 0) == (3, 3, 3)
+    finally:
+        ring.release()
+
+def test_reserve_grows_and_keeps_counting():
+    ring = afk.FrameRing(slots=2, width=4, height=4)
+    try:
+        ring.write(image(1, 4, 4), 0, 0)
+        frame = ring.write(image(2, 10, 8), 0, 0)
+        assert (ring.width, ring.height) == (10, 8)
+        assert frame.seq == 2 and frame.pixels.shape == (8, 10, 3)
+    finally:
+        ring.release()
+
+def test_attach_by_name():
+    ring = afk.FrameRing(slots=2, width=8, height=6)
+    if ring.name is None:
+        pytest.skip("no multiprocessing.shared_memory")
+    try:
+        ring.write(image(9), 20, 30)
+        other = afk.FrameRing(name=ring.name)
+        assert other.latest().color(20, 30) == (9, 9, 9)
+        with pytest.raises(ValueError):
+            other.reserve(16, 16)
+        other.release()
+    finally:
+        ring.release()
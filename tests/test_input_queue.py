@@ -0,0 +1,66 @@
+import threading
+import time
+
+import afk
+
+def blocked_queue(**kwargs):
+    """An InputQueue whose thread is busy until the returned event is set"""
+    queue = afk.InputQueue(**kwargs)
+    started, release = threading.Event(), threading.Event()
+    queue.put("send", lambda: (started.set(), release.wait(5)), "blocker")
+    assert started.wait(5)
+    return queue, release
+
+def drain(queue):
+    """Wait for everything queued so far to run"""
+    done = threading.Event()
+    while not queue.put("log", done.set, "drain"):
+        time.sleep(0.01)  # Dropped while the queue is full
+    assert done.wait(5)
+
+def test_clicks_run_before_jumps():
+    queue, release = blocked_queue()
+    order = []
+    queue.put("jump", lambda: order.append("jump"), "jump a")
+    queue.put("click", lambda: order.append("click"), "click a")
+    release.set()
+    drain(queue)
+    assert order == ["click", "jump"]
+
+def test_same_key_is_coalesced():
+    queue, release = blocked_queue()
+    order = []
+    for i in range(3):
+        assert queue.put("jump", lambda i=i: order.append(i), "jump a")
+    queue.put("jump", lambda: order.append("b"), "jump b")
+    release.set()
+    drain(queue)
+    assert order == [2, "b"]
+
+def test_backpressure_drops_lowest_priority():
+    queue, release = blocked_queue(max_pending=2)
+    order = []
+    assert queue.put("jump", lambda: order.append("jump a"), "jump a")
+    assert queue.put("jump", lambda: order.append("jump b"), "jump b")
+    assert not queue.put("jump", lambda: order.append("jump c"), "jump c")
+    assert queue.put("click", lambda: order.append("click"), "click a")
+    release.set()
+    drain(queue)
+    assert order == ["click", "jump a"]
+
+def test_failing_action_does_not_stop_the_queue():
+    queue = afk.InputQueue()
+    queue.put("click", lambda: 1 / 0, "bad")
+    drain(queue)
+
+def test_close_drops_pending_actions():
+    queue, release = blocked_queue()
+    ran = []
+    queue.put("click", lambda: ran.append("click"), "click a")
+    queue.put("jump", lambda: ran.append("jump"), "jump a")
+    queue.close()
+    assert not queue.put("click", lambda: ran.append("late"), "click b")
+    release.set()
+    queue.thread.join(5)
+    assert not queue.thread.is_alive()
+    assert ran == []
@@ -0,0 +1,39 @@
+import afk
+
+class ReplyBackend(afk.StubInputBackend):
+    """Answers every command with a fixed reply"""
+    def __init__(self, reply):
+        super().__init__()
+        self.reply = reply
+        self.closed = False
+
+    def send(self, command):
+        self.commands.append(command)
+        return self.reply
+
+    def close(self):
+        self.closed = True
+
+def test_latency_is_recorded_per_command():
+    worker = afk.InputWorker(afk.StubInputBackend())
+    worker.click(1, 2)
+    worker.click(3, 4)
+    worker.activate("Roblox")
+    assert worker.latency["click"][0] == 2
+    assert worker.latency["activate"][0] == 1
+
+def test_command_error_keeps_the_worker(monkeypatch):
+    backend = ReplyBackend("error window not active")
+    worker = afk.InputWorker(backend)
+    monkeypatch.setattr(afk, "input_worker", worker)
+    assert afk.run_ahk_script((10, 20)) is False
+    assert afk.input_worker is worker and not backend.closed
+
+def test_broken_pipe_drops_the_worker(monkeypatch):
+    class BrokenBackend(ReplyBackend):
+        def send(self, command):
+            raise RuntimeError("AHK worker exited")
+    backend = BrokenBackend("ok")
+    monkeypatch.setattr(afk, "input_worker", afk.InputWorker(backend))
+    assert afk.run_ahk_script((10, 20)) is False
+    assert afk.input_worker is None and backend.closed
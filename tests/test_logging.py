@@ -0,0 +1,38 @@
+import logging
+
+import afk
+
+def make_record(msg, *args, level=logging.WARNING):
+    return logging.LogRecord("rbxafk", level, __file__, 1, msg, args, None)
+
+def test_same_template_different_arguments_pass():
+    now = [0.0]
+    limit = afk.RateLimitFilter(interval=30, clock=lambda: now[0])
+    assert limit.filter(make_record("Warning: No config section for session %s", "a"))
+    assert limit.filter(make_record("Warning: No config section for session %s", "b"))
+    assert limit.filter(make_record("Watchdog: %s stalled", "loop", level=logging.ERROR))
+    assert limit.filter(make_record("Watchdog: %s stalled", "input", level=logging.ERROR))
+
+def test_repeats_are_limited_and_counted():
+    now = [0.0]
+    limit = afk.RateLimitFilter(interval=30, clock=lambda: now[0])
+    assert limit.filter(make_record("Capture failed: %s", "timeout"))
+    now[0] = 10
+    assert not limit.filter(make_record("Capture failed: %s", "timeout"))
+    assert not limit.filter(make_record("Capture failed: %s", "timeout"))
+    now[0] = 31
+    record = make_record("Capture failed: %s", "timeout")
+    assert limit.filter(record)
+    assert record.getMessage() == "Capture failed: timeout (suppressed 2 similar messages)"
+
+def test_info_is_never_limited():
+    limit = afk.RateLimitFilter(interval=30, clock=lambda: 0.0)
+    assert all(limit.filter(make_record("Clicked", level=logging.INFO)) for _ in range(3))
+
+def test_remembered_messages_are_bounded():
+    now = [0.0]
+    limit = afk.RateLimitFilter(interval=30, max_messages=3, clock=lambda: now[0])
+    for i in range(10):
+        now[0] = i
+        assert limit.filter(make_record("Error %s", i))
+        assert len(limit.seen) <= 3
@@ -0,0 +1,76 @@
+import numpy as np
+
+import afk
+
+DIALOG = (58, 59, 61)
+BUTTON = (255, 255, 255)
+
+def screen(width=40, height=30):
+    return np.zeros((height, width, 3), dtype=np.uint8)
+
+def frame(pixels, left=0, top=0):
+    return afk.Frame(pixels, left, top)
+
+def test_score_is_fraction_of_matching_probes():
+    matcher = afk.ProbeMatcher([((5, 5), DIALOG), ((10, 5), BUTTON)])
+    pixels = screen()
+    assert matcher.score(frame(pixels)) == 0.0
+    pixels[5, 5] = DIALOG
+    assert matcher.score(frame(pixels)) == 0.5
+    pixels[5, 10] = BUTTON
+    assert matcher.score(frame(pixels)) == 1.0
+
+def test_tolerance_applies_per_channel():
+    matcher = afk.ProbeMatcher([((5, 5), DIALOG)], tolerance=10)
+    pixels = screen()
+    pixels[5, 5] = (68, 49, 61)
+    assert matcher.score(frame(pixels)) == 1.0
+    pixels[5, 5] = (69, 59, 61)
+    assert matcher.score(frame(pixels)) == 0.0
+
+def test_frame_offset_is_applied():
+    matcher = afk.ProbeMatcher([((105, 205), DIALOG)])
+    pixels = screen()
+    pixels[5, 5] = DIALOG
+    assert matcher.score(frame(pixels, left=100, top=200)) == 1.0
+
+def test_patch_counts_as_one_probe():
+    patch = np.full((4, 4, 3), BUTTON, dtype=np.uint8)
+    matcher = afk.ProbeMatcher([((0, 0), DIALOG)], patches=[((10, 10), patch)])
+    pixels = screen()
+    pixels[10:14, 10:14] = BUTTON
+    assert matcher.score(frame(pixels)) == 0.5
+    pixels[10:12, 10:14] = 0
+    assert matcher.score(frame(pixels)) == 0.25
+
+def test_excluded_probes_are_ignored():
+    matcher = afk.ProbeMatcher([((5, 5), DIALOG), ((20, 5), BUTTON)])
+    pixels = screen()
+    pixels[5, 5] = DIALOG
+    assert matcher.exclude([(15, 0, 30, 10)]) == 1
+    assert matcher.score(frame(pixels)) == 1.0
+    matcher.exclude([])
+    assert matcher.score(frame(pixels)) == 0.5
+
+def test_fully_excluded_matcher_scores_zero():
+    matcher = afk.ProbeMatcher([((5, 5), DIALOG)])
+    pixels = screen()
+    pixels[5, 5] = DIALOG
+    matcher.exclude([(0, 0, 40, 30)])
+    assert matcher.score(frame(pixels)) == 0.0
+
+def test_combined_groups_score_independently():
+    dialog = afk.ProbeMatcher([((5, 5), DIALOG)])
+    rule = afk.ProbeMatcher([((20, 20), BUTTON), ((21, 20), BUTTON)], tolerance=0)
+    combined = afk.ProbeMatcher.combine([dialog, rule])
+    pixels = screen()
+    pixels[20, 20] = BUTTON
+    scores = combined.score_groups(combined.read(frame(pixels)))
+    np.testing.assert_allclose(scores, [0.0, 0.5])
+    assert combined.score(frame(pixels)) == 0.0
+
+def test_sentinels_sample_patches():
+    patch = np.zeros((8, 8, 3), dtype=np.uint8)
+    matcher = afk.ProbeMatcher([((0, 0), DIALOG)], patches=[((10, 10), patch)])
+    assert not matcher.sentinels_cover_all
+    assert len(matcher.sentinels) == 1 + afk.ProbeMatcher.SENTINELS_PER_PATCH
@@ -0,0 +1,40 @@
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+import afk
+
+def test_prometheus_label_values_are_escaped():
+    metrics = afk.Metrics()
+    metrics.inc("clicks_total", session='say "hi"\\now\nplease')
+    text = metrics.render_prometheus()
+    assert text == 'rbxafk_clicks_total{session="say \\"hi\\"\\\\now\\nplease"} 1\n'
+
+def test_histogram_buckets_are_cumulative():
+    metrics = afk.Metrics()
+    metrics.observe("capture_seconds", 0.002)
+    metrics.observe("capture_seconds", 0.02)
+    lines = metrics.render_prometheus().splitlines()
+    assert 'rbxafk_capture_seconds_bucket{le="0.001"} 0' in lines
+    assert 'rbxafk_capture_seconds_bucket{le="0.0025"} 1' in lines
+    assert 'rbxafk_capture_seconds_bucket{le="+Inf"} 2' in lines
+    assert "rbxafk_capture_seconds_count 2" in lines
+
+def test_metrics_server_routes(monkeypatch):
+    metrics = afk.Metrics()
+    metrics.inc("clicks_total", session="a")
+    monkeypatch.setattr(afk, "metrics", metrics)
+    server = afk.start_metrics_server(0)
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        with urllib.request.urlopen(base + "/metrics") as response:
+            assert b'rbxafk_clicks_total{session="a"} 1' in response.read()
+        with urllib.request.urlopen(base + "/metrics.json") as response:
+            assert json.loads(response.read())
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(base + "/other")
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,41 @@
+import asyncio
+import threading
+
+import numpy as np
+
+import afk
+
+PROFILE = {
+    "pixel_check_x": "12",
+    "pixel_check_y": "10",
+    "button_pixel_x": "30",
+    "button_pixel_y": "20",
+}
+
+class FakeInputs:
+    def __init__(self):
+        self.names = []
+
+    def put(self, key, action, name):
+        self.names.append(name)
+        return True
+
+    def close(self):
+        pass
+
+def test_async_check_captures_off_the_loop_thread():
+    screen = np.zeros((40, 48, 3), dtype=np.uint8)
+    screen[10, 12] = (58, 59, 61)
+    screen[20, 30] = (255, 255, 255)
+    threads = []
+    
+    def capture(bbox):
+        threads.append(threading.get_ident())
+        return screen[bbox[1]:bbox[3], bbox[0]:bbox[2]]
+    
+    session = afk.Session("a", afk.Profile("test", PROFILE))
+    orchestrator = afk.Orchestrator([session], sampler=afk.PixelSampler(capture), inputs=FakeInputs(),
+                                    sink=object())
+    assert asyncio.run(orchestrator.check_async())
+    assert threads and threads[0] != threading.get_ident()
+    assert orchestrator.inputs.names == ["click a"]
@@ -0,0 +1,63 @@
+import os
+
+import numpy as np
+import pytest
+
+import afk
+
+PROFILE = {
+    "pixel_check_x": "12",
+    "pixel_check_y": "10",
+    "button_pixel_x": "30",
+    "button_pixel_y": "20",
+}
+
+apps = []  # Qt aborts if the application is collected while widgets exist
+
+def qt_app():
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    QtWidgets = pytest.importorskip("PyQt5.QtWidgets")
+    app = QtWidgets.QApplication.instance()
+    if app is None:
+        app = QtWidgets.QApplication([])
+        apps.append(app)
+    if not isinstance(app, QtWidgets.QApplication):
+        pytest.skip("a QCoreApplication is already running")
+    return app
+
+def test_overlay_publishes_its_rect_while_shown(monkeypatch):
+    qt_app()
+    monkeypatch.setattr(afk, "excluded_rects", ())
+    overlay = afk.OverlayWidget("badge", "top-left")
+    overlay.show_overlay()
+    (left, top, right, bottom), = afk.excluded_rects
+    assert right > left and bottom > top
+    overlay.hide_overlay()
+    assert afk.excluded_rects == ()
+
+def test_panel_redraws_only_changed_text(monkeypatch):
+    qt_app()
+    monkeypatch.setattr(afk, "excluded_rects", ())
+    monkeypatch.setattr(afk, "status_lines", lambda snapshot, previous: ["AFK ON", "a: 0.50, 1 clicks, 0 jumps"])
+    overlay = afk.OverlayWidget("panel", refresh=3600)
+    overlay.show_overlay()
+    text = overlay.label.text()
+    assert text == "AFK ON\na: 0.50, 1 clicks, 0 jumps"
+    overlay.label.setText = lambda value: pytest.fail("redrew unchanged text")
+    overlay.refresh()
+    assert overlay.label.text() == text
+    overlay.hide_overlay()
+
+def test_probes_under_the_overlay_are_ignored(monkeypatch):
+    session = afk.Session("a", afk.Profile("test", PROFILE))
+    pixels = np.zeros((40, 48, 3), dtype=np.uint8)
+    pixels[10, 12] = (58, 59, 61)
+    monkeypatch.setattr(afk, "excluded_rects", ())
+    session.update(afk.Frame(pixels, 0, 0))
+    assert session.confidence == 0.5
+    monkeypatch.setattr(afk, "excluded_rects", ((25, 15, 35, 25),))  # Over the button probe
+    session.update(afk.Frame(pixels, 0, 0))
+    assert session.detected
+    monkeypatch.setattr(afk, "excluded_rects", ())
+    session.update(afk.Frame(pixels, 0, 0))
+    assert session.confidence == 0.5
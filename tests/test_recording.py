@@ -0,0 +1,158 @@
+import numpy as np
+import pytest
+
+import afk
+
+PROFILE = {
+    "pixel_check_x": "12",
+    "pixel_check_y": "10",
+    "button_pixel_x": "30",
+    "button_pixel_y": "20",
+}
+
+def frames(count):
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 40, size=(16, 24, 3), dtype=np.uint8)
+    for i in range(count):
+        pixels = pixels.copy()
+        pixels[i % 16, (i * 5) % 24] = (i * 11) % 256
+        yield afk.Frame(pixels, 10, 8)
+
+def test_recording_round_trip(tmp_path):
+    path = str(tmp_path / "afk.rbxrec")
+    session = afk.Session("main", afk.Profile("test", PROFILE))
+    session.set_origin((0, 0))
+    clock = iter(range(12)).__next__
+    recorder = afk.FrameRecorder(path, [session], keyframe_interval=5, clock=clock)
+    written = []
+    for frame in frames(12):
+        session.update(frame)
+        recorder.write(frame, 0.001, 0.002)
+        written.append(frame)
+    recorder.close()
+    
+    recording = afk.Recording(path)
+    read = list((r.frame.pixels.copy(), r.frame.left, r.frame.top, r.capture_seconds, r.decisions.copy())
+                for r in recording)
+    assert len(read) == len(written)
+    for frame, (pixels, left, top, capture_seconds, decisions) in zip(written, read):
+        np.testing.assert_array_equal(pixels, frame.pixels)
+        assert (left, top) == (10, 8)
+        assert abs(capture_seconds - 0.001) < 1e-6
+        assert (decisions[0]["x"], decisions[0]["y"]) == (0, 0)
+    assert [s.name for s in recording.sessions()] == ["main"]
+    recording.close()
+
+def test_replay_recomputes_confidence(tmp_path):
+    path = str(tmp_path / "afk.rbxrec")
+    session = afk.Session("main", afk.Profile("test", PROFILE))
+    session.set_origin((0, 0))
+    recorder = afk.FrameRecorder(path, [session])
+    pixels = np.zeros((16, 24, 3), dtype=np.uint8)
+    pixels[10 - 8, 12 - 10] = (58, 59, 61)
+    pixels[20 - 8, 30 - 10] = (255, 255, 255)
+    frame = afk.Frame(pixels, 10, 8)
+    session.update(frame)
+    recorder.write(frame)
+    recorder.close()
+    
+    recording = afk.Recording(path)
+    confidences = [sessions[0].confidence for _, sessions in afk.replay(recording)]
+    assert confidences == [session.confidence] and session.confidence == 1.0
+    recording.close()
+
+def record(path, session, count, **kwargs):
+    recorder = afk.FrameRecorder(path, [session], **kwargs)
+    for frame in frames(count):
+        recorder.write(frame)
+    recorder.close()
+
+def count_records(path):
+    recording = afk.Recording(path)
+    count = sum(1 for _ in recording)
+    recording.close()
+    return count
+
+def test_same_sessions_append(tmp_path):
+    path = str(tmp_path / "afk.rbxrec")
+    session = afk.Session("main", afk.Profile("test", PROFILE))
+    record(path, session, 3)
+    record(path, session, 4)
+    assert count_records(path) == 7
+    assert not (tmp_path / "afk.rbxrec.1").exists()
+
+def test_partial_record_is_dropped_on_append(tmp_path):
+    path = str(tmp_path / "afk.rbxrec")
+    session = afk.Session("main", afk.Profile("test", PROFILE))
+    record(path, session, 3)
+    with open(path, "ab") as f:
+        f.write(b"\xff" * 7)  # A write cut short by a crash
+    record(path, session, 2)
+    assert count_records(path) == 5
+
+def test_changed_sessions_shift_generations(tmp_path):
+    path = str(tmp_path / "afk.rbxrec")
+    main = afk.Session("main", afk.Profile("test", PROFILE))
+    alt = afk.Session("alt", afk.Profile("test", PROFILE))
+    record(path, main, 1, backups=2)
+    record(path, alt, 2, backups=2)
+    record(path, main, 3, backups=2)
+    record(path, alt, 4, backups=2)
+    assert count_records(path) == 4
+    assert count_records(path + ".1") == 3
+    assert count_records(path + ".2") == 2
+    assert not (tmp_path / "afk.rbxrec.3").exists()
+
+def test_set_sessions_keeps_file_for_same_layout(tmp_path):
+    path = str(tmp_path / "afk.rbxrec")
+    session = afk.Session("main", afk.Profile("test", PROFILE))
+    recorder = afk.FrameRecorder(path, [session])
+    frame = next(frames(1))
+    recorder.write(frame)
+    reloaded = afk.Session("main", afk.Profile("test", PROFILE))
+    recorder.set_sessions([reloaded])
+    recorder.write(frame)
+    recorder.set_sessions([afk.Session("alt", afk.Profile("test", PROFILE))])
+    recorder.write(frame)
+    recorder.close()
+    assert count_records(path + ".1") == 2
+    assert count_records(path) == 1
+
+def test_size_rotation(tmp_path):
+    path = str(tmp_path / "afk.rbxrec")
+    session = afk.Session("main", afk.Profile("test", PROFILE))
+    # Every record is a keyframe, and the file passes max_bytes after each one
+    record(path, session, 3, keyframe_interval=0, max_bytes=1, backups=2)
+    assert count_records(path) == 1
+    assert count_records(path + ".1") == 1
+    assert count_records(path + ".2") == 1
+    assert not (tmp_path / "afk.rbxrec.3").exists()
+
+def test_dropped_record_is_followed_by_a_keyframe(tmp_path, monkeypatch):
+    path = str(tmp_path / "afk.rbxrec")
+    session = afk.Session("main", afk.Profile("test", PROFILE))
+    recorder = afk.FrameRecorder(path, [session])
+    written = list(frames(4))
+    recorder.write(written[0])
+    submit = recorder.writer.submit
+    monkeypatch.setattr(recorder.writer, "submit", lambda *args, **kwargs: False)  # Writer is full
+    recorder.write(written[1])
+    monkeypatch.setattr(recorder.writer, "submit", submit)
+    recorder.write(written[2])
+    recorder.write(written[3])
+    recorder.close()
+    
+    recording = afk.Recording(path)
+    read = [r.frame.pixels.copy() for r in recording]
+    recording.close()
+    assert len(read) == 3
+    for pixels, frame in zip(read, [written[0], written[2], written[3]]):
+        np.testing.assert_array_equal(pixels, frame.pixels)
+
+def test_not_a_recording(tmp_path):
+    path = tmp_path / "afk.rbxrec"
+    for content in (b"", b"RBXREC\x00\x01", b"something else"):
+        path.write_bytes(content)
+        with pytest.raises(ValueError):
+            afk.Recording(str(path))
+    path.unlink()  # Fails on Windows if the file was left open
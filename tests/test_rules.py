@@ -0,0 +1,67 @@
+import configparser
+
+import numpy as np
+import pytest
+
+import afk
+
+PROFILE = {
+    "pixel_check_x": "12",
+    "pixel_check_y": "10",
+    "button_pixel_x": "30",
+    "button_pixel_y": "20",
+}
+
+class FakeInputs:
+    def __init__(self):
+        self.names = []
+
+    def put(self, key, action, name):
+        self.names.append(name)
+        return True
+
+    def close(self):
+        pass
+
+def rule_config(**rules):
+    config = configparser.ConfigParser()
+    for name, section in rules.items():
+        config[f"Rule {name}"] = section
+    return config
+
+def test_rule_actions():
+    rule = afk.Rule("ok", {"probes": "5,5,1,2,3", "action": "click 7,8", "cooldown": "2"})
+    assert (rule.action, rule.point, rule.cooldown) == ("click", (7, 8), 2.0)
+    assert afk.Rule("keys", {"probes": "5,5,1,2,3", "action": "send {Enter}"}).argument == "{Enter}"
+    with pytest.raises(ValueError):
+        afk.Rule("bad", {"probes": "5,5,1,2,3", "action": "explode"})
+
+def test_broken_rules_are_skipped():
+    config = rule_config(good={"probes": "5,5,1,2,3"}, bad={"probes": "5,5", "action": "log"})
+    assert [rule.name for rule in afk.load_rules(config)] == ["good"]
+
+def test_rules_are_scored_with_the_dialog():
+    rules = afk.load_rules(rule_config(
+        menu={"probes": "2,2,200,0,0; 3,2,200,0,0", "match_threshold": "0.5"},
+        other={"probes": "2,2,0,0,0", "profile": "another"}))
+    session = afk.Session("a", afk.Profile("test", PROFILE), rules=rules)
+    assert [rule.name for rule in session.rules] == ["menu"]
+    pixels = np.zeros((40, 48, 3), dtype=np.uint8)
+    pixels[2, 2] = (200, 0, 0)
+    session.update(afk.Frame(pixels, 0, 0))
+    np.testing.assert_allclose(session.scores, [0.0, 0.5])
+    assert list(session.fired_rules()) == [0]
+    assert not session.detected
+
+def test_fired_rule_waits_for_its_cooldown():
+    rules = afk.load_rules(rule_config(menu={"probes": "2,2,200,0,0", "action": "send {Esc}", "cooldown": "5"}))
+    session = afk.Session("a", afk.Profile("test", PROFILE), rules=rules)
+    now = [0.0]
+    orchestrator = afk.Orchestrator([session], sampler=object(), scheduler=afk.Scheduler(clock=lambda: now[0]),
+                                    inputs=FakeInputs(), sink=object())
+    pixels = np.zeros((40, 48, 3), dtype=np.uint8)
+    pixels[2, 2] = (200, 0, 0)
+    for second in (0, 1, 6):
+        now[0] = second
+        orchestrator.match([session], afk.Frame(pixels, 0, 0), 0.0)
+    assert orchestrator.inputs.names == ["rule menu a", "rule menu a"]
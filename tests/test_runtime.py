@@ -0,0 +1,35 @@
+import threading
+
+import pytest
+
+import afk
+
+def test_ui_bridge_runs_callbacks_on_the_qt_thread():
+    QtCore = pytest.importorskip("PyQt5.QtCore")
+    app = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+    bridge = afk.UiBridge()
+    qt_thread = threading.get_ident()
+    seen = []
+    
+    def other_thread():
+        for i in range(3):
+            bridge.call(lambda i=i: seen.append((i, threading.get_ident() == qt_thread)))
+        bridge.call(app.quit)
+    
+    threading.Thread(target=other_thread).start()
+    QtCore.QTimer.singleShot(5000, app.quit)
+    app.exec_()
+    assert seen == [(0, True), (1, True), (2, True)]
+
+def test_headless_runtime_runs_tasks_until_stopped():
+    runtime = afk.Runtime()
+    ran = []
+    
+    async def task():
+        ran.append(runtime.on_loop())
+        runtime.stop()
+    
+    runtime.call(lambda: runtime.spawn(task()))
+    runtime.serve()
+    runtime.loop.close()
+    assert ran == [True]
@@ -0,0 +1,86 @@
+import asyncio
+
+import afk
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def run_for(scheduler, clock, seconds):
+    """Drive the scheduler on the fake clock, jumping straight to each due time"""
+    end = clock.now + seconds
+    while clock.now < end:
+        timeout = scheduler.run_pending()
+        clock.now = min(end, clock.now + (timeout if timeout is not None else 1.0))
+
+def test_periodic_task_runs_on_its_period():
+    clock = FakeClock()
+    scheduler = afk.Scheduler(clock=clock, wait=None)
+    runs = []
+    scheduler.every("tick", 2.0, lambda: runs.append(clock.now))
+    run_for(scheduler, clock, 7.0)
+    assert runs == [0.0, 2.0, 4.0, 6.0]
+
+def test_unchanged_results_back_off_to_max_period():
+    clock = FakeClock()
+    scheduler = afk.Scheduler(clock=clock, wait=None)
+    task = scheduler.every("check", 0.1, lambda: False, max_period=0.5, backoff=2.0)
+    run_for(scheduler, clock, 0.05)
+    assert task.current_period == 0.2
+    run_for(scheduler, clock, 5.0)
+    assert task.current_period == 0.5
+
+def test_change_snaps_back_to_base_period():
+    clock = FakeClock()
+    scheduler = afk.Scheduler(clock=clock, wait=None)
+    changed = [False]
+    task = scheduler.every("check", 0.1, lambda: changed[0], max_period=0.5, backoff=2.0)
+    run_for(scheduler, clock, 5.0)
+    assert task.current_period == 0.5
+    changed[0] = True
+    run_for(scheduler, clock, 0.6)
+    assert task.current_period == 0.1
+
+def test_jitter_adds_up_to_jitter_seconds():
+    clock = FakeClock()
+    scheduler = afk.Scheduler(clock=clock, wait=None, rng=lambda low, high: high)
+    runs = []
+    scheduler.every("jump", 5.0, lambda: runs.append(clock.now), jitter=1.0)
+    run_for(scheduler, clock, 13.0)
+    assert runs == [0.0, 6.0, 12.0]
+
+def test_failing_task_is_postponed():
+    clock = FakeClock()
+    scheduler = afk.Scheduler(clock=clock, wait=None)
+    runs = []
+    
+    def fail():
+        runs.append(clock.now)
+        raise RuntimeError("no screen")
+    scheduler.every("check", 0.5, fail)
+    run_for(scheduler, clock, 3.0)
+    assert runs == [0.0, 1.5]
+
+def test_cancelled_task_stops_running():
+    clock = FakeClock()
+    scheduler = afk.Scheduler(clock=clock, wait=None)
+    runs = []
+    task = scheduler.every("tick", 1.0, lambda: runs.append(clock.now))
+    run_for(scheduler, clock, 1.5)
+    task.cancel()
+    run_for(scheduler, clock, 5.0)
+    assert runs == [0.0, 1.0]
+
+def test_async_run_awaits_coroutine_callbacks():
+    clock = FakeClock()
+    scheduler = afk.Scheduler(clock=clock, wait=None)
+    
+    async def unchanged():
+        return False
+    
+    task = scheduler.every("check", 0.1, unchanged, max_period=0.5, backoff=2.0)
+    assert asyncio.run(scheduler.run_pending_async()) == 0.2  # Backed off, due again at 0.2
+    assert task.current_period == 0.2
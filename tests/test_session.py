@@ -0,0 +1,50 @@
+import numpy as np
+from PIL import Image
+
+import afk
+
+PROFILE = {
+    "pixel_check_x": "12",
+    "pixel_check_y": "10",
+    "button_pixel_x": "30",
+    "button_pixel_y": "20",
+}
+
+def dialog_screen():
+    pixels = np.zeros((40, 64, 3), dtype=np.uint8)
+    pixels[10, 12] = (58, 59, 61)
+    pixels[20, 30] = (255, 255, 255)
+    return pixels
+
+def test_unchanged_frames_keep_the_last_score():
+    session = afk.Session("a", afk.Profile("test", PROFILE))
+    pixels = dialog_screen()
+    assert session.update(afk.Frame(pixels, 0, 0))
+    assert session.confidence == 1.0
+    assert not session.update(afk.Frame(pixels.copy(), 0, 0))
+    assert session.unchanged_checks == 1
+    pixels[20, 30] = 0
+    assert session.update(afk.Frame(pixels, 0, 0))
+    assert session.confidence == 0.5 and session.unchanged_checks == 0
+
+def test_patch_changes_between_sentinels_wait_for_the_full_check(tmp_path):
+    Image.fromarray(np.zeros((8, 8, 3), dtype=np.uint8)).save(tmp_path / "patch.png")
+    profile = dict(PROFILE, reference_patches=f"40,0,{tmp_path / 'patch.png'}", match_threshold="0.5")
+    session = afk.Session("a", afk.Profile("test", profile))
+    pixels = dialog_screen()
+    session.update(afk.Frame(pixels, 0, 0))
+    full = session.confidence
+    pixels[0, 41] = 255  # Not a sentinel: patch pixel 1 of 64, sampled every 4th
+    for _ in range(afk.FULL_CHECK_EVERY - 1):
+        assert not session.update(afk.Frame(pixels, 0, 0))
+        assert session.confidence == full
+    session.update(afk.Frame(pixels, 0, 0))
+    assert session.confidence < full
+    assert session.unchanged_checks == 0
+
+def test_offset_session_reads_its_own_window():
+    session = afk.Session("b", afk.Profile("test", PROFILE), offset=(100, 0))
+    pixels = np.zeros((40, 164, 3), dtype=np.uint8)
+    pixels[:, 100:] = dialog_screen()[:, :64]
+    session.update(afk.Frame(pixels, 0, 0))
+    assert session.detected
@@ -0,0 +1,60 @@
+import afk
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def supervisor():
+    clock = FakeClock()
+    return afk.Supervisor(interval=3600, clock=clock), clock
+
+def test_beating_component_is_not_stalled():
+    watchdog, clock = supervisor()
+    watchdog.watch("loop", 10)
+    for second in range(1, 30):
+        clock.now = second
+        watchdog.beat("loop")
+        assert watchdog.check() == []
+
+def test_stall_runs_recover_once_per_timeout():
+    watchdog, clock = supervisor()
+    recovered = []
+    watchdog.watch("loop", 10, lambda: recovered.append(clock.now))
+    clock.now = 10
+    assert watchdog.check() == []
+    clock.now = 10.5
+    assert watchdog.check() == ["loop"]
+    clock.now = 15
+    assert watchdog.check() == []  # Recovery gets a full timeout
+    clock.now = 21
+    assert watchdog.check() == ["loop"]
+    assert recovered == [10.5, 21]
+
+def test_recovery_is_measured_at_the_next_beat():
+    watchdog, clock = supervisor()
+    watchdog.watch("input", 5)
+    clock.now = 6
+    watchdog.check()
+    assert "input" in watchdog.stalls
+    clock.now = 8
+    watchdog.beat("input")
+    assert "input" not in watchdog.stalls
+
+def test_unwatch_only_removes_the_owners_watch():
+    watchdog, clock = supervisor()
+    old, new = object(), object()
+    watchdog.watch("loop", 10, owner=old)
+    watchdog.watch("loop", 10, owner=new)
+    watchdog.unwatch("loop", old)
+    assert "loop" in watchdog.watches
+    watchdog.unwatch("loop", new)
+    assert "loop" not in watchdog.watches
+
+def test_failing_recover_is_contained():
+    watchdog, clock = supervisor()
+    watchdog.watch("loop", 1, lambda: 1 / 0)
+    clock.now = 2
+    assert watchdog.check() == ["loop"]
@@ -0,0 +1,31 @@
+import pytest
+
+import afk
+
+def test_parse_title_criteria():
+    parse = afk.Win32WindowBackend.parse_title
+    assert parse("Roblox") == ("Roblox", {})
+    assert parse("Roblox ahk_pid 1234") == ("Roblox", {"pid": "1234"})
+    assert parse("ahk_exe RobloxPlayerBeta.exe") == ("", {"exe": "RobloxPlayerBeta.exe"})
+    assert parse("Roblox ahk_class WINDOWSCLIENT ahk_exe RobloxPlayerBeta.exe") == (
+        "Roblox", {"class": "WINDOWSCLIENT", "exe": "RobloxPlayerBeta.exe"})
+
+def test_unsupported_criterion_raises():
+    with pytest.raises(ValueError):
+        afk.Win32WindowBackend.parse_title("ahk_group Roblox")
+
+def test_locator_caches_until_the_window_moves():
+    backend = afk.StubWindowBackend({"Roblox": (0, 0, 800, 600)})
+    locator = afk.WindowLocator(backend)
+    assert locator.rect("Roblox") == (0, 0, 800, 600)
+    backend.windows["Roblox"] = (100, 50, 900, 650)
+    assert locator.rect("Roblox") == (0, 0, 800, 600)
+    backend.move("Roblox", (100, 50, 900, 650))
+    assert locator.rect("Roblox") == (100, 50, 900, 650)
+
+def test_missing_window_is_not_looked_up_every_time():
+    backend = afk.StubWindowBackend()
+    locator = afk.WindowLocator(backend)
+    assert locator.rect("Roblox") is None
+    backend.windows["Roblox"] = (0, 0, 800, 600)
+    assert locator.rect("Roblox") is None
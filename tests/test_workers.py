@@ -0,0 +1,136 @@
+import time
+
+import numpy as np
+
+import afk
+
+PROFILE = {
+    "pixel_check_x": "12",
+    "pixel_check_y": "10",
+    "button_pixel_x": "30",
+    "button_pixel_y": "20",
+}
+
+class FakeProcess:
+    def __init__(self):
+        self.running = True
+
+    def is_alive(self):
+        return self.running
+
+class FakePool:
+    """Stands in for DetectionPool: rows and beats are set by the test"""
+    def __init__(self, sessions, workers):
+        self.processes = [FakeProcess() for _ in range(workers)]
+        self.beats = [0.0] * workers
+        self.rows = [(0, 0.0, False, 0) for _ in sessions]
+        self.windows = {}
+        self.restarted = []
+
+    def set_window(self, slot, rect):
+        self.windows[slot] = rect
+
+    def set_excluded(self, rects):
+        pass
+
+    def read(self, slot):
+        return self.rows[slot]
+
+    def restart(self, index):
+        self.restarted.append(index)
+        self.processes[index] = FakeProcess()
+
+    def close(self):
+        pass
+
+class FakeInputs:
+    def __init__(self):
+        self.names = []
+
+    def put(self, key, action, name):
+        self.names.append(name)
+        return True
+
+    def close(self):
+        pass
+
+class NoWindows:
+    def rect(self, title):
+        return None
+
+def orchestrator(sessions, windows=None):
+    now = [0.0]
+    clock = lambda: now[0]
+    orchestrator = afk.Orchestrator(sessions, sampler=object(), scheduler=afk.Scheduler(clock=clock),
+                                    inputs=FakeInputs(), sink=object(), windows=windows,
+                                    supervisor=afk.Supervisor(interval=3600, clock=clock), loop_timeout=10)
+    orchestrator.workers = 2
+    orchestrator.pool = FakePool(sessions, 2)
+    orchestrator.watch_workers()
+    return orchestrator, now
+
+def test_only_the_silent_worker_is_restarted():
+    sessions = [afk.Session(name, afk.Profile("test", PROFILE)) for name in ("a", "b")]
+    orch, now = orchestrator(sessions)
+    for second in range(1, 12):
+        now[0] = second
+        orch.pool.beats[0] += 1
+        orch.collect()
+        orch.supervisor.check()
+    assert orch.stalled_workers == {1}
+    orch.collect()
+    assert orch.pool.restarted == [1]
+    assert orch.stalled_workers == set()
+
+def test_stale_result_stops_clicking():
+    sessions = [afk.Session(name, afk.Profile("test", PROFILE)) for name in ("a", "b")]
+    orch, now = orchestrator(sessions)
+    orch.pool.rows[0] = (2, 1.0, True, 0)
+    orch.collect()
+    assert orch.inputs.names == ["click a"]
+    now[0] = 11
+    orch.collect()
+    assert not sessions[0].detected
+    now[0] = 12
+    orch.collect()
+    assert orch.inputs.names == ["click a"]
+
+def test_missing_windows_are_not_a_stall():
+    profile = dict(PROFILE, coordinates="client")
+    sessions = [afk.Session(name, afk.Profile("test", profile)) for name in ("a", "b")]
+    orch, now = orchestrator(sessions, windows=NoWindows())
+    for second in range(1, 30):
+        now[0] = second
+        orch.pool.beats[0] += 1
+        orch.pool.beats[1] += 1
+        orch.check()
+        assert orch.supervisor.check() == []
+    assert orch.pool.windows == {0: None, 1: None}
+
+class DialogCapture:
+    """Picklable capture factory: a screen showing the disconnect dialog at PROFILE's probes"""
+    def __call__(self):
+        screen = np.zeros((40, 48, 3), dtype=np.uint8)
+        screen[10, 12] = (58, 59, 61)
+        screen[20, 30] = (255, 255, 255)
+        return lambda bbox: screen[bbox[1]:bbox[3], bbox[0]:bbox[2]]
+
+def wait_for(condition, timeout=30):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+
+def test_pool_with_synthetic_capture():
+    session = afk.Session("a", afk.Profile("test", PROFILE))
+    pool = afk.DetectionPool([session], 1, capture_factory=DialogCapture())
+    try:
+        wait_for(lambda: (pool.read(0) or (0, 0.0))[1] == 1.0)
+        assert pool.beats[0] > 0
+        # The overlay covering the probes is masked in the worker too
+        pool.set_excluded(((0, 0, 48, 40),))
+        wait_for(lambda: (pool.read(0) or (0, 1.0))[1] == 0.0)
+    finally:
+        pool.close()
+    pool.table[0][afk.RESULT_SEQ] += 1  # Stuck mid-write
+    assert pool.read(0, retries=5) is None